@@ -1,4 +1,5 @@
 from functools import lru_cache
+import json
 import os
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
@@ -6,6 +7,13 @@ from pydantic import BaseModel, Field
 load_dotenv()
 
 
+def _env_flag(name: str, default: bool) -> bool:
+    val = os.getenv(name)
+    if val is None or not val.strip():
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+
 class Settings(BaseModel):
     # App
     app_name: str = "KG-RAG Physio (Gemini)"
@@ -20,6 +28,7 @@ class Settings(BaseModel):
     # Gemini Developer API
     gemini_api_key: str = Field(default_factory=lambda: os.getenv("GEMINI_API_KEY", ""))
     gemini_model: str = Field(default_factory=lambda: os.getenv("GEMINI_MODEL", "gemini-3-flash-preview"))
+    gemini_fallback_model: str = Field(default="gemini-2.5-flash-lite")  # empty disables hedging
 
 
     # Retrieval
@@ -27,6 +36,53 @@ class Settings(BaseModel):
     fulltext_index_name: str = Field(default="rehab_fulltext_index")  # optional (for hybrid)
     top_k: int = Field(default=5)
 
+    # Per-domain shards, e.g. [{"name": "knee", "vector_index": "rehab_knee_vector_index",
+    #   "label": "KneeChunk", "fulltext_index": "rehab_knee_fulltext_index",
+    #   "keywords": ["knee", "acl", "meniscus"], "description": "knee injuries and rehab"}]
+    vector_shards: list[dict] = Field(default_factory=list)
+    shard_max_fanout: int = Field(default=2)
+    shard_min_similarity: float = Field(default=0.35)
+
+    # Reranking (optional): cross-encoder over a candidate pool + precomputed centrality prior
+    rerank_enabled: bool = Field(default=False)
+    rerank_model: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    rerank_candidates: int = Field(default=20)
+    rerank_prior_property: str = Field(default="pagerank")  # empty disables the prior
+    rerank_prior_weight: float = Field(default=0.2)
+    rerank_cache_size: int = Field(default=4096)
+
+    # In-process graph snapshot for subgraph expansion (export_graph_snapshot.py)
+    graph_snapshot_path: str = Field(default="data/graph_snapshot")
+    graph_snapshot_hops: int = Field(default=1)
+    graph_snapshot_refresh_s: float = Field(default=60.0)  # 0 disables refresh and new-export pickup
+    # Labels whose `updated_at` is watched by the refresh; each gets a range index
+    graph_snapshot_change_labels: list[str] = Field(default_factory=lambda: ["Chunk"])
+
+    # Latency budgets (seconds); stages get min(own budget, time left on the request)
+    request_timeout_s: float = Field(default=30.0)
+    retrieval_budget_s: float = Field(default=5.0)
+    subgraph_budget_s: float = Field(default=3.0)
+    generation_budget_s: float = Field(default=25.0)
+    hedge_after_s: float = Field(default=8.0)
+    evidence_only_fallback: bool = Field(default=True)
+
+    # Admission control for /query
+    admission_max_in_flight: int = Field(default=8)
+    admission_max_queue: int = Field(default=32)
+    admission_max_wait_s: float = Field(default=10.0)
+    admission_prioritise_short: bool = Field(default=True)
+    admission_short_query_chars: int = Field(default=120)
+
+    # Diagram retrieval (CLIP, loaded lazily on the first image query)
+    image_index_path: str = Field(default="data/image_index")
+    clip_model: str = Field(default="clip-ViT-B-32")
+    image_top_k: int = Field(default=3)
+
+    # Startup: create constraints/indexes (needs schema privileges) and warm Neo4j caches
+    schema_bootstrap: bool = Field(default=False)
+    startup_warmup: bool = Field(default=True)
+    warmup_queries: list[str] = Field(default_factory=lambda: ["knee pain exercises", "squat form and safety"])
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -37,7 +93,46 @@ def get_settings() -> Settings:
         neo4j_database=os.getenv("NEO4J_DATABASE") or None,
         gemini_api_key=os.getenv("GEMINI_API_KEY", ""),
         gemini_model=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+        gemini_fallback_model=os.getenv("GEMINI_FALLBACK_MODEL", "gemini-2.5-flash-lite"),
         vector_index_name=os.getenv("VECTOR_INDEX_NAME", "rehab_vector_index"),
         fulltext_index_name=os.getenv("FULLTEXT_INDEX_NAME", "rehab_fulltext_index"),
         top_k=int(os.getenv("TOP_K", "5")),
+        vector_shards=json.loads(os.getenv("VECTOR_SHARDS") or "[]"),
+        shard_max_fanout=int(os.getenv("SHARD_MAX_FANOUT", "2")),
+        shard_min_similarity=float(os.getenv("SHARD_MIN_SIMILARITY", "0.35")),
+        rerank_enabled=_env_flag("RERANK_ENABLED", False),
+        rerank_model=os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+        rerank_candidates=int(os.getenv("RERANK_CANDIDATES", "20")),
+        rerank_prior_property=os.getenv("RERANK_PRIOR_PROPERTY", "pagerank"),
+        rerank_prior_weight=float(os.getenv("RERANK_PRIOR_WEIGHT", "0.2")),
+        rerank_cache_size=int(os.getenv("RERANK_CACHE_SIZE", "4096")),
+        graph_snapshot_path=os.getenv("GRAPH_SNAPSHOT_PATH", "data/graph_snapshot"),
+        graph_snapshot_hops=int(os.getenv("GRAPH_SNAPSHOT_HOPS", "1")),
+        graph_snapshot_refresh_s=float(os.getenv("GRAPH_SNAPSHOT_REFRESH_S", "60")),
+        graph_snapshot_change_labels=[
+            label.strip()
+            for label in os.getenv("GRAPH_SNAPSHOT_CHANGE_LABELS", "Chunk").split(",")
+            if label.strip()
+        ],
+        request_timeout_s=float(os.getenv("REQUEST_TIMEOUT_S", "30")),
+        retrieval_budget_s=float(os.getenv("RETRIEVAL_BUDGET_S", "5")),
+        subgraph_budget_s=float(os.getenv("SUBGRAPH_BUDGET_S", "3")),
+        generation_budget_s=float(os.getenv("GENERATION_BUDGET_S", "25")),
+        hedge_after_s=float(os.getenv("HEDGE_AFTER_S", "8")),
+        evidence_only_fallback=_env_flag("EVIDENCE_ONLY_FALLBACK", True),
+        admission_max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8")),
+        admission_max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "32")),
+        admission_max_wait_s=float(os.getenv("ADMISSION_MAX_WAIT_S", "10")),
+        admission_prioritise_short=_env_flag("ADMISSION_PRIORITISE_SHORT", True),
+        admission_short_query_chars=int(os.getenv("ADMISSION_SHORT_QUERY_CHARS", "120")),
+        image_index_path=os.getenv("IMAGE_INDEX_PATH", "data/image_index"),
+        clip_model=os.getenv("CLIP_MODEL", "clip-ViT-B-32"),
+        image_top_k=int(os.getenv("IMAGE_TOP_K", "3")),
+        schema_bootstrap=_env_flag("SCHEMA_BOOTSTRAP", False),
+        startup_warmup=_env_flag("STARTUP_WARMUP", True),
+        warmup_queries=[
+            q.strip()
+            for q in os.getenv("WARMUP_QUERIES", "knee pain exercises;squat form and safety").split(";")
+            if q.strip()
+        ],
     )
@@ -1,19 +1,45 @@
-from fastapi import FastAPI, Depends
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+from fastapi import FastAPI, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from neo4j_graphrag.embeddings.sentence_transformers import SentenceTransformerEmbeddings
 from .config import Settings, get_settings
-from .schemas import QueryRequest, QueryResponse, EvidenceNode, EvidenceEdge
+from .schemas import QueryRequest, QueryResponse, EvidenceNode, EvidenceEdge, EvidenceImage
+from .services.admission import PRIORITY_HIGH, PRIORITY_NORMAL, AdmissionController, AdmissionRejected
+from .services.graph_snapshot import CURRENT_FILE, GraphSnapshot, start_refresher
+from .services.image_store import ImageRetriever
 from .services.neo4j_client import Neo4jClient
+from .services.deadline import Deadline, DeadlineExceeded, LatencyBudgets
 from .services.graphrag_service import GraphRAGService
+from .services.reranker import CrossEncoderReranker
+from .services.sharding import Shard
+from .services.schema_bootstrap import SchemaBootstrapper, SchemaMismatchError
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Schema/warm-up is blocking Neo4j and model work, so keep it off the event loop.
+    await run_in_threadpool(bootstrap_schema)
+    yield
+
 
-app = FastAPI(title="KG-RAG Physio (Gemini)")
+app = FastAPI(title="KG-RAG Physio (Gemini)", lifespan=lifespan)
 
 _service: GraphRAGService | None = None
 _neo4j: Neo4jClient | None = None
+_embedder: SentenceTransformerEmbeddings | None = None
+_admission: AdmissionController | None = None
 
 
-def get_service(settings: Settings = Depends(get_settings)) -> GraphRAGService:
-    global _service, _neo4j
+def get_neo4j(settings: Settings) -> Neo4jClient:
+    global _neo4j
 
-    if _service is None:
+    if _neo4j is None:
         _neo4j = Neo4jClient(
             uri=settings.neo4j_uri,
             user=settings.neo4j_user,
@@ -21,33 +47,185 @@ def get_service(settings: Settings = Depends(get_settings)) -> GraphRAGService:
             database=settings.neo4j_database,
         )
 
-        _service = GraphRAGService(
-            neo4j_client=_neo4j,
+    return _neo4j
+
+
+def get_embedder() -> SentenceTransformerEmbeddings:
+    global _embedder
+
+    if _embedder is None:
+        _embedder = SentenceTransformerEmbeddings(model="all-MiniLM-L6-v2")
+
+    return _embedder
+
+
+def get_service(settings: Settings = Depends(get_settings)) -> GraphRAGService:
+    global _service
+
+    if _service is None:
+        neo4j = get_neo4j(settings)
+
+        snapshot_dir = Path(settings.graph_snapshot_path)
+        snapshot = GraphSnapshot(snapshot_dir) if (snapshot_dir / CURRENT_FILE).exists() else None
+
+        service = GraphRAGService(
+            neo4j_client=neo4j,
             gemini_api_key=settings.gemini_api_key,
             gemini_model=settings.gemini_model,
             vector_index_name=settings.vector_index_name,
             fulltext_index_name=settings.fulltext_index_name,
             top_k=settings.top_k,
+            embedder=get_embedder(),
+            image_retriever=ImageRetriever(
+                index_dir=settings.image_index_path,
+                model_name=settings.clip_model,
+                top_k=settings.image_top_k,
+            ),
+            budgets=LatencyBudgets(
+                request_s=settings.request_timeout_s,
+                retrieval_s=settings.retrieval_budget_s,
+                subgraph_s=settings.subgraph_budget_s,
+                generation_s=settings.generation_budget_s,
+                hedge_after_s=settings.hedge_after_s,
+            ),
+            fallback_gemini_model=settings.gemini_fallback_model,
+            evidence_only_fallback=settings.evidence_only_fallback,
+            reranker=CrossEncoderReranker(
+                model_name=settings.rerank_model,
+                prior_property=settings.rerank_prior_property or None,
+                prior_weight=settings.rerank_prior_weight,
+                cache_size=settings.rerank_cache_size,
+            )
+            if settings.rerank_enabled
+            else None,
+            rerank_candidates=settings.rerank_candidates,
+            graph_snapshot=snapshot,
+            snapshot_hops=settings.graph_snapshot_hops,
+            shards=[Shard(**s) for s in settings.vector_shards],
+            shard_max_fanout=settings.shard_max_fanout,
+            shard_min_similarity=settings.shard_min_similarity,
         )
 
+        if settings.graph_snapshot_refresh_s > 0:
+
+            def use_snapshot(new: GraphSnapshot) -> None:
+                service.graph_snapshot = new
+
+            # Also picks up the first export when the API started without one.
+            start_refresher(
+                snapshot_dir,
+                neo4j,
+                settings.graph_snapshot_refresh_s,
+                on_swap=use_snapshot,
+                snapshot=snapshot,
+            )
+        _service = service
+
     return _service
 
 
+async def get_admission(settings: Settings = Depends(get_settings)) -> AdmissionController:
+    # async so FastAPI resolves it on the event loop: no threadpool race on first use,
+    # and the controller's state stays on the loop thread as it requires.
+    global _admission
+
+    if _admission is None:
+        _admission = AdmissionController(
+            max_in_flight=settings.admission_max_in_flight,
+            max_queue=settings.admission_max_queue,
+            max_wait_s=settings.admission_max_wait_s,
+        )
+
+    return _admission
+
+
+def bootstrap_schema() -> None:
+    """
+    Create/verify the schema, then build the service and warm Neo4j so the first requests
+    after a restart don't pay for model loading, query planning and a cold page cache.
+    The service is only built once the indexes exist, since its retrievers need them.
+    """
+    settings = get_settings()
+    if not (settings.schema_bootstrap or settings.startup_warmup):
+        return
+
+    bootstrapper = SchemaBootstrapper(
+        neo4j_client=get_neo4j(settings),
+        embedder=get_embedder(),
+        vector_index_name=settings.vector_index_name,
+        fulltext_index_name=settings.fulltext_index_name,
+        shards=[Shard(**s) for s in settings.vector_shards],
+        change_labels=settings.graph_snapshot_change_labels,
+    )
+    factory = (lambda: get_service(settings)) if settings.startup_warmup else None
+
+    if settings.schema_bootstrap:
+        # Asked to own the schema: if it can't be created the API cannot serve, so refuse to boot.
+        bootstrapper.run(service_factory=factory, create=True, warmup_queries=settings.warmup_queries)
+        return
+
+    try:
+        bootstrapper.run(service_factory=factory, create=False, warmup_queries=settings.warmup_queries)
+    except SchemaMismatchError:
+        # Wrong embedding size: every query would fail, so refuse to boot.
+        raise
+    except Exception:
+        # Neo4j may still be starting; serve cold rather than refuse to boot. Missing
+        # indexes only log a warning (see SchemaBootstrapper.run).
+        logger.exception("Startup warm-up failed")
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
-@app.post("/query", response_model=QueryResponse)
-def query_endpoint(payload: QueryRequest, service: GraphRAGService = Depends(get_service)):
-    answer, raw_context, nodes_raw, edges_raw = service.query(payload.query, mode=payload.mode)
+@app.get("/metrics/admission")
+async def admission_metrics(admission: AdmissionController = Depends(get_admission)):
+    return admission.metrics()
+
+
+def _answer(payload: QueryRequest, service: GraphRAGService) -> QueryResponse:
+    deadline = Deadline(service.budgets.request_s)
+    # Diagram search doesn't depend on the answer, so it runs alongside it.
+    images_job = service.start_image_search(payload.query) if payload.include_images else None
+    try:
+        answer, raw_context, nodes_raw, edges_raw = service.query(
+            payload.query, mode=payload.mode, deadline=deadline
+        )
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
 
     nodes = [EvidenceNode(**n) for n in nodes_raw]
     edges = [EvidenceEdge(**e) for e in edges_raw]
+    images = [EvidenceImage(**vars(hit)) for hit in service.await_images(images_job, deadline)]
 
     return QueryResponse(
         answer=answer,
         nodes=nodes,
         edges=edges,
         raw_context=raw_context,
-    )
\ No newline at end of file
+        images=images,
+    )
+
+
+@app.post("/query", response_model=QueryResponse)
+async def query_endpoint(
+    payload: QueryRequest,
+    service: GraphRAGService = Depends(get_service),
+    admission: AdmissionController = Depends(get_admission),
+    settings: Settings = Depends(get_settings),
+):
+    # Admission runs on the event loop, so queued requests don't hold threadpool workers.
+    short = len(payload.query) <= settings.admission_short_query_chars and not payload.include_images
+    priority = PRIORITY_HIGH if settings.admission_prioritise_short and short else PRIORITY_NORMAL
+
+    try:
+        async with admission.admit(priority):
+            return await run_in_threadpool(_answer, payload, service)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_s)},
+        )
\ No newline at end of file
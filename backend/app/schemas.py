@@ -5,6 +5,7 @@ from typing import List, Optional, Literal
 class QueryRequest(BaseModel):
     query: str = Field(min_length=1)
     mode: Literal["vector", "hybrid"] = "vector"
+    include_images: bool = False
 
 
 class EvidenceNode(BaseModel):
@@ -19,8 +20,16 @@ class EvidenceEdge(BaseModel):
     relation: str
 
 
+class EvidenceImage(BaseModel):
+    id: str
+    path: str
+    caption: Optional[str] = None
+    score: float
+
+
 class QueryResponse(BaseModel):
     answer: str
     nodes: List[EvidenceNode]
     edges: List[EvidenceEdge]
-    raw_context: List[str]
\ No newline at end of file
+    raw_context: List[str]
+    images: List[EvidenceImage] = []
\ No newline at end of file
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+
+class AdmissionRejected(Exception):
+    """Load shed: the caller should retry after `retry_after_s` seconds (HTTP 429)."""
+
+    def __init__(self, reason: str, retry_after_s: int):
+        super().__init__(f"Server busy ({reason}); retry after {retry_after_s}s")
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    """
+    Caps concurrent /query work and queues the overflow with a bounded wait.
+
+    - up to `max_in_flight` requests run at once
+    - up to `max_queue` more wait, lowest priority value first, FIFO within a priority
+    - anything beyond that, or waiting longer than `max_wait_s`, is rejected at once so
+      it fails fast instead of timing out after holding a worker thread
+
+    All state lives on the event loop thread; call it from async endpoints only.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, max_wait_s: float):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_s = max_wait_s
+
+        self._in_flight = 0
+        self._queued = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+        # Metrics
+        self._admitted = 0
+        self._rejected_queue_full = 0
+        self._rejected_timeout = 0
+        self._wait_total_s = 0.0
+        self._service_ewma_s: float | None = None
+
+    def _retry_after(self) -> int:
+        """Rough time for the queue ahead to drain, from the moving average service time."""
+        per_request = self._service_ewma_s or 1.0
+        batches = (self._queued + 1) / self.max_in_flight
+        return max(1, math.ceil(per_request * batches))
+
+    def _grant_next(self) -> None:
+        while self._waiters and self._in_flight < self.max_in_flight:
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():  # gave up waiting
+                continue
+            self._queued -= 1
+            self._in_flight += 1
+            fut.set_result(None)
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> float:
+        """Wait for a slot and return the time spent queued (seconds)."""
+        if self._in_flight < self.max_in_flight and self._queued == 0:
+            self._in_flight += 1
+            self._admitted += 1
+            return 0.0
+
+        if self._queued >= self.max_queue:
+            self._rejected_queue_full += 1
+            raise AdmissionRejected("queue full", self._retry_after())
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._queued += 1
+        start = time.monotonic()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=self.max_wait_s)
+        except asyncio.TimeoutError:
+            if not fut.done():
+                fut.cancel()
+                self._queued -= 1
+                self._rejected_timeout += 1
+                raise AdmissionRejected("queue wait exceeded", self._retry_after()) from None
+        except asyncio.CancelledError:
+            # Client went away: give back a slot we were handed, or leave the queue.
+            if fut.done() and not fut.cancelled():
+                self.release()
+            else:
+                fut.cancel()
+                self._queued -= 1
+            raise
+
+        waited = time.monotonic() - start
+        self._admitted += 1
+        self._wait_total_s += waited
+        return waited
+
+    def release(self, service_time_s: float | None = None) -> None:
+        self._in_flight -= 1
+        if service_time_s is not None:
+            if self._service_ewma_s is None:
+                self._service_ewma_s = service_time_s
+            else:
+                self._service_ewma_s = 0.8 * self._service_ewma_s + 0.2 * service_time_s
+        self._grant_next()
+
+    @asynccontextmanager
+    async def admit(self, priority: int = PRIORITY_NORMAL) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted_total": self._admitted,
+            "rejected_queue_full_total": self._rejected_queue_full,
+            "rejected_timeout_total": self._rejected_timeout,
+            "avg_queue_wait_ms": (self._wait_total_s / self._admitted * 1000.0) if self._admitted else 0.0,
+            "avg_service_ms": (self._service_ewma_s or 0.0) * 1000.0,
+        }
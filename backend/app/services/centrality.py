@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from typing import Iterable, List
+
+from .neo4j_client import Neo4jClient
+
+_PROPERTY_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def fetch_edges(neo4j: Neo4jClient) -> List[tuple[str, str]]:
+    with neo4j.driver.session(database=neo4j.database) as session:
+        rows = session.run("MATCH (a)-[]->(b) RETURN elementId(a) AS a, elementId(b) AS b")
+        return [(row["a"], row["b"]) for row in rows]
+
+
+def _adjacency(edges: Iterable[tuple[str, str]], directed: bool) -> dict[str, list[str]]:
+    out: dict[str, list[str]] = defaultdict(list)
+    for a, b in edges:
+        out[a].append(b)
+        if not directed:
+            out[b].append(a)
+        else:
+            out.setdefault(b, [])
+    return out
+
+
+def degree(edges: Iterable[tuple[str, str]], directed: bool = False) -> dict[str, float]:
+    return {node: float(len(nbrs)) for node, nbrs in _adjacency(edges, directed).items()}
+
+
+def pagerank(
+    edges: Iterable[tuple[str, str]],
+    directed: bool = False,
+    damping: float = 0.85,
+    iterations: int = 50,
+    tol: float = 1e-8,
+) -> dict[str, float]:
+    """Power-iteration PageRank; mass from dangling nodes is spread uniformly."""
+    out = _adjacency(edges, directed)
+    nodes = list(out)
+    n = len(nodes)
+    if n == 0:
+        return {}
+
+    rank = {node: 1.0 / n for node in nodes}
+    for _ in range(iterations):
+        dangling = sum(rank[node] for node in nodes if not out[node])
+        base = (1.0 - damping) / n + damping * dangling / n
+        nxt = {node: base for node in nodes}
+        for node in nodes:
+            nbrs = out[node]
+            if nbrs:
+                share = damping * rank[node] / len(nbrs)
+                for m in nbrs:
+                    nxt[m] += share
+        delta = sum(abs(nxt[node] - rank[node]) for node in nodes)
+        rank = nxt
+        if delta < tol:
+            break
+    return rank
+
+
+def write_scores(
+    neo4j: Neo4jClient, scores: dict[str, float], prop: str, batch_size: int = 1000
+) -> int:
+    if not _PROPERTY_RE.match(prop):
+        raise ValueError(f"Invalid property name: {prop!r}")
+
+    cypher = (
+        "UNWIND $rows AS row MATCH (n) WHERE elementId(n) = row.id "
+        f"SET n.`{prop}` = row.score"
+    )
+    rows = [{"id": node_id, "score": score} for node_id, score in scores.items()]
+    with neo4j.driver.session(database=neo4j.database) as session:
+        for start in range(0, len(rows), batch_size):
+            session.run(cypher, {"rows": rows[start : start + batch_size]}).consume()
+    return len(rows)
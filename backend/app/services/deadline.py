@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+
+
+class DeadlineExceeded(TimeoutError):
+    """A request stage ran out of its share of the end-to-end budget."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    Absolute, monotonic request deadline passed down through every stage.
+    Stages ask for `budget(cap)` (their own cap clipped to what is left) rather than
+    using fixed timeouts, so a slow early stage shrinks the later ones.
+    """
+
+    def __init__(self, seconds: float | None):
+        self.expires_at = math.inf if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def budget(self, cap: float | None = None) -> float | None:
+        """Seconds a stage may use, or None when neither the stage nor the request is bounded."""
+        remaining = self.remaining()
+        if cap is not None:
+            remaining = min(cap, remaining)
+        return None if math.isinf(remaining) else remaining
+
+    def check(self, stage: str) -> None:
+        if self.expired:
+            raise DeadlineExceeded(stage)
+
+
+@dataclass
+class LatencyBudgets:
+    """Per-stage caps (seconds). None means the stage only inherits the request deadline."""
+
+    request_s: float | None = None
+    retrieval_s: float | None = None
+    subgraph_s: float | None = None
+    generation_s: float | None = None
+    # Start the fallback model if the primary has not answered after this long.
+    hedge_after_s: float | None = None
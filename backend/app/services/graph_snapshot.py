@@ -0,0 +1,499 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Tuple
+
+import numpy as np
+
+from .neo4j_client import Neo4jClient
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+ARRAYS = ("indptr", "indices", "rel_types", "outgoing", "node_types", "legacy_ids", "legacy_order")
+STRING_TABLES = ("node_ids", "labels")
+
+# Same fallback order extract_evidence_subgraph uses for display labels.
+_LABEL_EXPR = "coalesce(n.name, n.title, n.text, n.content, n.chunk, elementId(n))"
+
+_NODES_CYPHER = f"""
+MATCH (n)
+RETURN elementId(n) AS id, id(n) AS legacy_id, head(labels(n)) AS type, {_LABEL_EXPR} AS label
+"""
+
+_RELS_CYPHER = """
+MATCH (a)-[r]->(b)
+RETURN elementId(a) AS source, elementId(b) AS target, type(r) AS type
+"""
+
+
+def _quote(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _changed_nodes_cypher(labels: Iterable[str], updated_property: str) -> str:
+    """
+    Nodes with `updated_property > $since`, one branch per label so each is answered from
+    that label's range index (see SchemaBootstrapper.ensure_change_indexes) instead of a
+    scan over every node.
+    """
+    prop = _quote(updated_property)
+    branches = [f"MATCH (n:{_quote(label)}) WHERE n.{prop} > $since RETURN n" for label in labels]
+    return "CALL {\n    " + "\n    UNION\n    ".join(branches) + "\n}"
+
+
+def current_version(snapshot_dir: str | Path) -> str | None:
+    """The published snapshot version, or None before the first export."""
+    try:
+        return (Path(snapshot_dir) / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+@dataclass(frozen=True)
+class _Edge:
+    neighbour: int
+    rel_type: int
+    outgoing: bool
+
+
+class _Interner:
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: list[str] = list(values)
+        self.index: dict[str, int] = {v: i for i, v in enumerate(self.values)}
+
+    def __call__(self, value: str) -> int:
+        idx = self.index.get(value)
+        if idx is None:
+            idx = self.index[value] = len(self.values)
+            self.values.append(value)
+        return idx
+
+
+def _save_strings(target: Path, name: str, values: List[str]) -> None:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    np.save(target / f"{name}_offsets.npy", offsets)
+    np.save(target / f"{name}_blob.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+class _StringTable:
+    """Read-only sequence of strings backed by a memory-mapped UTF-8 blob plus offsets."""
+
+    def __init__(self, directory: Path, name: str):
+        self.offsets = np.load(directory / f"{name}_offsets.npy", mmap_mode="r")
+        self.blob = np.load(directory / f"{name}_blob.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return self.offsets.shape[0] - 1
+
+    def __getitem__(self, idx: int) -> str:
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+    def find(self, needle: str, limit: int) -> List[int]:
+        """Indices of strings containing `needle` (ASCII case-insensitive), scanning the mapped blob."""
+        if self.blob.shape[0] == 0:
+            return []
+        pattern = re.compile(re.escape(needle.encode("utf-8")), re.IGNORECASE)
+        buf = memoryview(self.blob)
+        hits: list[int] = []
+        pos = 0
+        while len(hits) < limit:
+            match = pattern.search(buf, pos)
+            if match is None:
+                break
+            idx = int(np.searchsorted(self.offsets, match.start(), side="right")) - 1
+            end = int(self.offsets[idx + 1])
+            if match.end() <= end:
+                hits.append(idx)
+                pos = end
+            else:  # straddles two strings
+                pos = match.start() + 1
+        return hits
+
+
+def export_snapshot(
+    neo4j: Neo4jClient,
+    out_dir: str | Path,
+    updated_property: str = "updated_at",
+    change_labels: Iterable[str] = ("Chunk",),
+    keep: int = 2,
+) -> Path:
+    """
+    Dump the whole graph into CSR adjacency arrays plus string tables for node ids and
+    labels, all as memory-mappable .npy files; meta.json only keeps the interned type names.
+
+    Nodes are ordered by elementId, so an id lookup is a binary search over the mapped
+    table. Each relationship is stored in both endpoints' rows with an `outgoing` flag, so
+    undirected expansion is a single slice per node. Snapshots are written to a new
+    versioned directory and published by rewriting CURRENT, so readers never see a
+    half-written snapshot.
+    """
+    out_dir = Path(out_dir)
+    change_labels = list(change_labels)
+    # Never reuse a directory: np.save truncates in place, which would pull the pages out
+    # from under workers that have the old files mapped (SIGBUS).
+    now_ns = time.time_ns()
+    version = time.strftime("%Y%m%dT%H%M%S", time.localtime(now_ns // 1_000_000_000))
+    version += f".{now_ns % 1_000_000_000:09d}"
+    target = out_dir / version
+    out_dir.mkdir(parents=True, exist_ok=True)
+    target.mkdir(exist_ok=False)
+
+    with neo4j.driver.session(database=neo4j.database) as session:
+        watermark = None
+        if change_labels:
+            watermark = session.run(
+                f"{_changed_nodes_cypher(change_labels, updated_property)} "
+                f"RETURN max(n.{_quote(updated_property)}) AS ts",
+                {"since": 0},
+            ).single()["ts"]
+        nodes = [r.data() for r in session.run(_NODES_CYPHER)]
+        rels = [r.data() for r in session.run(_RELS_CYPHER)]
+
+    nodes.sort(key=lambda n: n["id"])
+    node_index = {n["id"]: i for i, n in enumerate(nodes)}
+    node_types = _Interner()
+    rel_types = _Interner()
+
+    adjacency: list[list[tuple[int, int, bool]]] = [[] for _ in nodes]
+    for rel in rels:
+        a, b = node_index.get(rel["source"]), node_index.get(rel["target"])
+        if a is None or b is None:  # created between the two reads
+            continue
+        t = rel_types(rel["type"])
+        adjacency[a].append((b, t, True))
+        adjacency[b].append((a, t, False))
+
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(row) for row in adjacency])
+    flat = [e for row in adjacency for e in row]
+    legacy_ids = np.array(
+        [n["legacy_id"] if n["legacy_id"] is not None else -1 for n in nodes], dtype=np.int64
+    )
+    arrays = {
+        "indptr": indptr,
+        "indices": np.array([e[0] for e in flat], dtype=np.int32),
+        "rel_types": np.array([e[1] for e in flat], dtype=np.int32),
+        "outgoing": np.array([e[2] for e in flat], dtype=np.bool_),
+        "node_types": np.array(
+            [node_types(n["type"]) if n["type"] else -1 for n in nodes], dtype=np.int32
+        ),
+        "legacy_ids": legacy_ids,
+        "legacy_order": np.argsort(legacy_ids, kind="stable").astype(np.int64),
+    }
+    for name, arr in arrays.items():
+        np.save(target / f"{name}.npy", arr)
+    _save_strings(target, "node_ids", [n["id"] for n in nodes])
+    _save_strings(target, "labels", [str(n["label"]) for n in nodes])
+
+    meta = {
+        "created_at": version,
+        "updated_property": updated_property,
+        "change_labels": change_labels,
+        "watermark": watermark,
+        "node_count": len(nodes),
+        "node_type_names": node_types.values,
+        "rel_type_names": rel_types.values,
+    }
+    (target / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+    tmp = out_dir / f"{CURRENT_FILE}.tmp"
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, out_dir / CURRENT_FILE)
+
+    versions = sorted(p for p in out_dir.iterdir() if p.is_dir())
+    for old in versions[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+    return target
+
+
+@dataclass
+class _Overlay:
+    """
+    Changes applied since the export. refresh() builds a new one and swaps it in, so a
+    published overlay is never mutated and readers see one consistent version.
+    """
+
+    # changed node -> its full edge list (authoritative over the CSR row)
+    override: dict[int, list[_Edge]] = field(default_factory=dict)
+    # unchanged node -> edges mirrored from changed neighbours
+    extra: dict[int, list[_Edge]] = field(default_factory=dict)
+    # changed or appended node -> {"id", "label", "type"}
+    nodes: dict[int, dict] = field(default_factory=dict)
+    # appended nodes only; exported ones are found in the mapped tables
+    by_element_id: dict[str, int] = field(default_factory=dict)
+    by_legacy_id: dict[int, int] = field(default_factory=dict)
+
+
+class GraphSnapshot:
+    """
+    Read-only, in-process copy of the knowledge graph for evidence-subgraph expansion.
+
+    Everything proportional to the graph (CSR arrays, node ids, labels, legacy ids) is
+    memory-mapped, so worker processes share one page-cached copy, and a k-hop expansion
+    is a few array slices instead of a Bolt round-trip.
+
+    `refresh()` applies incremental changes on top: nodes carrying one of the export's
+    change labels whose `updated_property` (epoch millis, e.g. `SET n.updated_at =
+    timestamp()`) is newer than the watermark get their full neighbourhood re-read from
+    Neo4j and served from an overlay. Deletions are only picked up by the next full export,
+    which start_refresher() swaps in.
+    """
+
+    def __init__(self, snapshot_dir: str | Path):
+        self.root = Path(snapshot_dir)
+        version = current_version(self.root)
+        if version is None:
+            raise FileNotFoundError(f"No graph snapshot published in {self.root}")
+        self.version = version
+        self.path = self.root / version
+
+        meta = json.loads((self.path / META_FILE).read_text(encoding="utf-8"))
+        self.updated_property: str = meta["updated_property"]
+        self.change_labels: list[str] = meta.get("change_labels", [])
+        self.watermark: Any = meta["watermark"]
+        self.node_type_names = _Interner(meta["node_type_names"])
+        self.rel_type_names = _Interner(meta["rel_type_names"])
+
+        arrays = {name: np.load(self.path / f"{name}.npy", mmap_mode="r") for name in ARRAYS}
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.rel_types = arrays["rel_types"]
+        self.outgoing = arrays["outgoing"]
+        self.node_types = arrays["node_types"]
+        self.legacy_ids = arrays["legacy_ids"]
+        self.legacy_order = arrays["legacy_order"]
+        self.node_ids = _StringTable(self.path, "node_ids")
+        self.labels = _StringTable(self.path, "labels")
+
+        count = meta["node_count"]
+        if self.indptr.shape[0] != count + 1 or len(self.node_ids) != count or len(self.labels) != count:
+            raise ValueError(f"Graph snapshot at {self.path} is inconsistent")
+
+        self._overlay = _Overlay()
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids) + len(self._overlay.by_element_id)
+
+    def _element_index(self, element_id: str, overlay: _Overlay) -> int | None:
+        idx = overlay.by_element_id.get(element_id)
+        if idx is not None:
+            return idx
+        pos = bisect_left(self.node_ids, element_id)
+        return pos if pos < len(self.node_ids) and self.node_ids[pos] == element_id else None
+
+    def _legacy_index(self, legacy_id: int, overlay: _Overlay) -> int | None:
+        idx = overlay.by_legacy_id.get(legacy_id)
+        if idx is not None:
+            return idx
+        pos = int(np.searchsorted(self.legacy_ids, legacy_id, sorter=self.legacy_order))
+        if pos < self.legacy_order.shape[0]:
+            idx = int(self.legacy_order[pos])
+            if int(self.legacy_ids[idx]) == legacy_id:
+                return idx
+        return None
+
+    def _neighbours(self, idx: int, overlay: _Overlay) -> List[_Edge]:
+        if idx in overlay.override:
+            return overlay.override[idx]
+
+        edges: list[_Edge] = []
+        if idx < len(self.node_ids):
+            start, end = int(self.indptr[idx]), int(self.indptr[idx + 1])
+            for nbr, t, out in zip(
+                self.indices[start:end].tolist(),
+                self.rel_types[start:end].tolist(),
+                self.outgoing[start:end].tolist(),
+            ):
+                # Edges touching a changed node are authoritative in that node's override.
+                if nbr not in overlay.override:
+                    edges.append(_Edge(nbr, t, bool(out)))
+        edges.extend(overlay.extra.get(idx, ()))
+        return edges
+
+    def _node(self, idx: int, overlay: _Overlay) -> dict:
+        if idx in overlay.nodes:
+            return dict(overlay.nodes[idx])
+        element_id = self.node_ids[idx]
+        t = int(self.node_types[idx])
+        return {
+            "id": element_id,
+            "label": self.labels[idx] or element_id,
+            "type": self.node_type_names.values[t] if t >= 0 else None,
+        }
+
+    def seeds(self, element_ids: Iterable[str], legacy_ids: Iterable[int]) -> List[int]:
+        overlay = self._overlay
+        found = {self._element_index(e, overlay) for e in element_ids}
+        found |= {self._legacy_index(i, overlay) for i in legacy_ids}
+        found.discard(None)
+        return sorted(found)
+
+    def expand(
+        self, seeds: Iterable[int], hops: int = 1, limit: int = 50
+    ) -> Tuple[list[dict], list[dict]]:
+        """
+        Breadth-first k-hop neighbourhood, in the same (nodes, edges) shape as
+        GraphRAGService.extract_evidence_subgraph. `limit` caps the number of edges,
+        like the LIMIT on the Cypher version.
+        """
+        overlay = self._overlay
+        nodes: dict[int, dict] = {}
+        edges: list[dict] = []
+        seen_edges: set[tuple[int, int, int]] = set()
+        frontier = list(dict.fromkeys(seeds))
+        for idx in frontier:
+            nodes[idx] = self._node(idx, overlay)
+
+        for _ in range(max(1, hops)):
+            nxt: list[int] = []
+            for idx in frontier:
+                for edge in self._neighbours(idx, overlay):
+                    src, dst = (idx, edge.neighbour) if edge.outgoing else (edge.neighbour, idx)
+                    key = (src, dst, edge.rel_type)
+                    if key in seen_edges:
+                        continue
+                    if len(edges) >= limit:
+                        return list(nodes.values()), edges
+                    seen_edges.add(key)
+                    if edge.neighbour not in nodes:
+                        nodes[edge.neighbour] = self._node(edge.neighbour, overlay)
+                        nxt.append(edge.neighbour)
+                    edges.append(
+                        {
+                            "source": nodes[src]["id"],
+                            "target": nodes[dst]["id"],
+                            "relation": self.rel_type_names.values[edge.rel_type],
+                        }
+                    )
+            frontier = nxt
+
+        return list(nodes.values()), edges
+
+    def match_labels(self, query: str, limit: int = 10) -> List[int]:
+        """
+        Case-insensitive substring match on labels; stands in for the text-match Cypher
+        when Neo4j drops out between retrieval and subgraph expansion.
+        """
+        overlay = self._overlay
+        q = query.lower()
+        hits = [idx for idx, node in overlay.nodes.items() if q in node["label"].lower()][:limit]
+        for idx in self.labels.find(query, limit):
+            if len(hits) >= limit:
+                break
+            if idx not in overlay.nodes and idx not in hits:
+                hits.append(idx)
+        return hits
+
+    def _intern_node(self, row: dict, overlay: _Overlay) -> int:
+        idx = self._element_index(row["id"], overlay)
+        if idx is None:
+            idx = len(self.node_ids) + len(overlay.by_element_id)
+            overlay.by_element_id[row["id"]] = idx
+            if row.get("legacy_id") is not None:
+                overlay.by_legacy_id[row["legacy_id"]] = idx
+        overlay.nodes[idx] = {"id": row["id"], "label": str(row["label"]), "type": row["type"]}
+        return idx
+
+    def refresh(self, neo4j: Neo4jClient) -> int:
+        """Pull nodes changed since the watermark into the overlay. Returns how many changed."""
+        if not self.change_labels:
+            return 0
+
+        cypher = f"""
+        {_changed_nodes_cypher(self.change_labels, self.updated_property)}
+        OPTIONAL MATCH (n)-[r]-(m)
+        RETURN elementId(n) AS id, id(n) AS legacy_id, head(labels(n)) AS type,
+               {_LABEL_EXPR} AS label, n.{_quote(self.updated_property)} AS ts,
+               collect(CASE WHEN r IS NULL THEN NULL ELSE {{
+                   id: elementId(m), legacy_id: id(m), type: head(labels(m)),
+                   label: coalesce(m.name, m.title, m.text, m.content, m.chunk, elementId(m)),
+                   rel: type(r), outgoing: startNode(r) = n
+               }} END) AS rels
+        """
+        with self._refresh_lock:
+            with neo4j.driver.session(database=neo4j.database) as session:
+                rows = [r.data() for r in session.run(cypher, {"since": self.watermark or 0})]
+            if not rows:
+                return 0
+
+            # Advance the watermark only together with the overlay it describes, so a
+            # failure part-way leaves both untouched and the next refresh retries.
+            watermark = self.watermark
+
+            old = self._overlay
+            overlay = _Overlay(
+                override=dict(old.override),
+                nodes=dict(old.nodes),
+                by_element_id=dict(old.by_element_id),
+                by_legacy_id=dict(old.by_legacy_id),
+            )
+            for row in rows:
+                idx = self._intern_node(row, overlay)
+                overlay.override[idx] = [
+                    _Edge(self._intern_node(rel, overlay), self.rel_type_names(rel["rel"]), rel["outgoing"])
+                    for rel in row["rels"]
+                ]
+                if row["ts"] is not None and (watermark is None or row["ts"] > watermark):
+                    watermark = row["ts"]
+
+            # Mirror override edges onto unchanged neighbours so expansion works from either end.
+            for idx, edges in overlay.override.items():
+                for edge in edges:
+                    if edge.neighbour not in overlay.override:
+                        overlay.extra.setdefault(edge.neighbour, []).append(
+                            _Edge(idx, edge.rel_type, not edge.outgoing)
+                        )
+
+            self._overlay, self.watermark = overlay, watermark
+            return len(rows)
+
+
+def start_refresher(
+    snapshot_dir: str | Path,
+    neo4j: Neo4jClient,
+    interval_s: float,
+    on_swap: Callable[[GraphSnapshot], None],
+    snapshot: GraphSnapshot | None = None,
+) -> threading.Thread:
+    """
+    Background upkeep, every `interval_s`: when CURRENT points at a newer export, load it
+    and hand it to `on_swap`; otherwise apply incremental changes to the live snapshot.
+    Failures are logged and retried next interval.
+    """
+
+    def loop() -> None:
+        current = snapshot
+        while True:
+            time.sleep(interval_s)
+            try:
+                version = current_version(snapshot_dir)
+                if version is not None and (current is None or version != current.version):
+                    current = GraphSnapshot(snapshot_dir)
+                    on_swap(current)
+                    logger.info("Graph snapshot %s loaded", current.version)
+                elif current is not None:
+                    changed = current.refresh(neo4j)
+                    if changed:
+                        logger.info("Graph snapshot refreshed: %d changed nodes", changed)
+            except Exception:
+                logger.warning("Graph snapshot refresh failed", exc_info=True)
+
+    thread = threading.Thread(target=loop, name="graph-snapshot-refresh", daemon=True)
+    thread.start()
+    return thread
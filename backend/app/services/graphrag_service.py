@@ -1,16 +1,29 @@
 from __future__ import annotations
 
 import ast
+import logging
 import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
 from dataclasses import dataclass
 from typing import Any, List, Tuple
 
 from google import genai
+from google.genai import types
+from neo4j import Query
+from neo4j.exceptions import Neo4jError, ServiceUnavailable, SessionExpired
 
 from neo4j_graphrag.embeddings.sentence_transformers import SentenceTransformerEmbeddings
 from neo4j_graphrag.retrievers import VectorRetriever, HybridRetriever
 
-from .neo4j_client import Neo4jClient
+from .deadline import Deadline, DeadlineExceeded, LatencyBudgets
+from .graph_snapshot import GraphSnapshot
+from .image_store import ImageHit, ImageRetriever
+from .neo4j_client import Neo4jClient, TimedDriver, transaction_timeout
+from .reranker import CrossEncoderReranker
+from .sharding import Shard, ShardedRetriever, ShardRouter
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -25,12 +38,17 @@ class GraphRAGService:
     Retrieval:
       - VectorRetriever or HybridRetriever from neo4j-graphrag
       - SentenceTransformerEmbeddings (open-source, local)
+      - optional per-domain shards: routed by keywords/description, searched in parallel, merged
+      - optional cross-encoder rerank of a larger candidate pool, blended with a graph-centrality prior
 
     Generation:
       - Gemini Developer API (google-genai SDK)
+      - hedged: if the primary model is slow or fails, a faster fallback model races it,
+        and an evidence-only answer is returned if neither finishes within the deadline
 
     Output:
       - Answer + evidence context + a small subgraph (nodes/edges) for later UI visualization.
+        Served from the in-process graph snapshot when one is loaded, Neo4j otherwise.
     """
 
     def __init__(
@@ -41,6 +59,21 @@ class GraphRAGService:
         vector_index_name: str,
         fulltext_index_name: str,
         top_k: int = 5,
+        embedder: Any | None = None,
+        retrievers: dict[str, Any] | None = None,
+        image_retriever: ImageRetriever | None = None,
+        budgets: LatencyBudgets | None = None,
+        fallback_gemini_model: str | None = None,
+        evidence_only_fallback: bool = True,
+        executor_workers: int = 32,
+        retrieval_workers: int = 8,
+        reranker: CrossEncoderReranker | None = None,
+        rerank_candidates: int = 20,
+        graph_snapshot: GraphSnapshot | None = None,
+        snapshot_hops: int = 1,
+        shards: List[Shard] | None = None,
+        shard_max_fanout: int = 2,
+        shard_min_similarity: float = 0.35,
     ):
         if not gemini_api_key:
             raise ValueError("Missing GEMINI_API_KEY. Set it in backend/.env")
@@ -48,23 +81,57 @@ class GraphRAGService:
         self.neo4j = neo4j_client
         self.top_k = top_k
         self.gemini_model = gemini_model
+        self.image_retriever = image_retriever
+        self.budgets = budgets or LatencyBudgets()
+        self.fallback_gemini_model = fallback_gemini_model or None
+        self.evidence_only_fallback = evidence_only_fallback
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.graph_snapshot = graph_snapshot
+        self.snapshot_hops = snapshot_hops
+
+        # Runs deadline-bounded stages; a stage that overruns is abandoned, not awaited.
+        self._executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="graphrag")
+        # Retrieval gets its own pool, so searches abandoned on timeout can't starve
+        # generation and subgraph work; Neo4j also kills them at the same budget.
+        self._retrieval_executor = ThreadPoolExecutor(
+            max_workers=retrieval_workers, thread_name_prefix="graphrag-retrieval"
+        )
 
         # Open-source embeddings (local)
-        self.embedder = SentenceTransformerEmbeddings(model="all-MiniLM-L6-v2")
-
-        # Retrievers
-        self.vector_retriever = VectorRetriever(
-            driver=self.neo4j.driver,
-            index_name=vector_index_name,
-            embedder=self.embedder,
-        )
+        self.embedder = embedder or SentenceTransformerEmbeddings(model="all-MiniLM-L6-v2")
 
-        self.hybrid_retriever = HybridRetriever(
-            driver=self.neo4j.driver,
-            vector_index_name=vector_index_name,
-            fulltext_index_name=fulltext_index_name,
-            embedder=self.embedder,
-        )
+        # Retrievers (injectable so evaluation can run against an in-memory stand-in)
+        if retrievers is not None:
+            self.vector_retriever = retrievers["vector"]
+            self.hybrid_retriever = retrievers.get("hybrid", self.vector_retriever)
+        else:
+            self.vector_retriever = VectorRetriever(
+                driver=self.neo4j.driver,
+                index_name=vector_index_name,
+                embedder=self.embedder,
+            )
+
+            self.hybrid_retriever = HybridRetriever(
+                driver=self.neo4j.driver,
+                vector_index_name=vector_index_name,
+                fulltext_index_name=fulltext_index_name,
+                embedder=self.embedder,
+            )
+            # Their searches then honour the transaction_timeout() set in retrieve().
+            for retriever in (self.vector_retriever, self.hybrid_retriever):
+                retriever.driver = TimedDriver(retriever.driver)
+
+        # Domain shards; queries no shard claims fall through to the global index above.
+        # Shard retrievers are built on first use, so a new shard's index can be created later.
+        self.sharded_retriever: ShardedRetriever | None = None
+        if shards:
+            router = ShardRouter(
+                shards, self.embedder, max_fanout=shard_max_fanout, min_similarity=shard_min_similarity
+            )
+            self.sharded_retriever = ShardedRetriever.from_neo4j(
+                self.neo4j.driver, self.embedder, router, database=self.neo4j.database
+            )
 
         # Gemini client
         # Quickstart shows API key can be provided; environment variable GEMINI_API_KEY also works. :contentReference[oaicite:8]{index=8}
@@ -85,8 +152,10 @@ class GraphRAGService:
 
         You may need to tweak this depending on your Neo4j schema and which properties you store.
         """
-        if isinstance(raw, tuple) and len(raw) == 2:
-            records, meta = raw  # RawSearchResult according to docs
+        if hasattr(raw, "records"):
+            records, meta = raw.records, raw.metadata or {}  # RawSearchResult (pydantic model)
+        elif isinstance(raw, tuple) and len(raw) == 2:
+            records, meta = raw
         else:
             records, meta = raw, {}
         items: List[RetrievedItem] = []
@@ -133,12 +202,93 @@ class GraphRAGService:
 
         return items
 
-    def retrieve(self, query: str, mode: str = "vector") -> List[RetrievedItem]:
+    def _search(self, query: str, mode: str, top_k: int) -> Any:
+        # get_search_results returns raw records (node, elementId, score); search() would
+        # stringify them and drop the ids the evidence subgraph needs.
+        query_vector = None
+        if self.sharded_retriever is not None:
+            routed, query_vector = self.sharded_retriever.route(query)
+            if routed:
+                merged = self.sharded_retriever.get_search_results(
+                    query, routed, query_vector, top_k=top_k, mode=mode
+                )
+                if merged is not None:
+                    return merged
+        # No shard claimed the query, or every routed shard failed. Routing already
+        # embedded the query, so reuse the vector for the global index.
         if mode == "hybrid":
-            raw = self.hybrid_retriever.search(query_text=query, top_k=self.top_k)
-        else:
-            raw = self.vector_retriever.search(query_text=query, top_k=self.top_k)
-        return self._format_retrieval(raw)
+            return self.hybrid_retriever.get_search_results(
+                query_text=query, query_vector=query_vector, top_k=top_k
+            )
+        if query_vector is not None:
+            return self.vector_retriever.get_search_results(query_vector=query_vector, top_k=top_k)
+        return self.vector_retriever.get_search_results(query_text=query, top_k=top_k)
+
+    def _retrieve(self, query: str, mode: str, top_k: int) -> List[RetrievedItem]:
+        if self.reranker is None:
+            return self._format_retrieval(self._search(query, mode, top_k))
+
+        # Over-fetch a candidate pool, then keep the best top_k after reranking.
+        pool = self._format_retrieval(self._search(query, mode, max(top_k, self.rerank_candidates)))
+        return self.reranker.rerank(query, pool, top_k)
+
+    def retrieve(
+        self,
+        query: str,
+        mode: str = "vector",
+        top_k: int | None = None,
+        deadline: Deadline | None = None,
+    ) -> List[RetrievedItem]:
+        k = top_k or self.top_k
+        if deadline is None:
+            return self._retrieve(query, mode, k)
+
+        # The same budget bounds the wait here and each index query inside Neo4j.
+        deadline.check("retrieval")
+        budget = deadline.budget(self.budgets.retrieval_s)
+        future = self._retrieval_executor.submit(self._retrieve_within, budget, query, mode, k)
+        try:
+            return future.result(timeout=budget)
+        except FutureTimeout:
+            raise DeadlineExceeded("retrieval") from None
+
+    def _retrieve_within(
+        self, timeout_s: float | None, query: str, mode: str, top_k: int
+    ) -> List[RetrievedItem]:
+        with transaction_timeout(timeout_s):
+            return self._retrieve(query, mode, top_k)
+
+    def start_image_search(self, query: str, top_k: int | None = None) -> Future | None:
+        """
+        Start CLIP diagram retrieval in the background so it overlaps with answering;
+        collect it with await_images(). None when no image retriever is configured.
+        """
+        if self.image_retriever is None:
+            return None
+        return self._executor.submit(self.image_retriever.search, query, top_k)
+
+    def await_images(self, future: Future | None, deadline: Deadline | None = None) -> List[ImageHit]:
+        """
+        Images are supplementary, like the subgraph: an exhausted deadline or a failed
+        search (e.g. an index caught mid-rebuild) yields no images rather than an error.
+        """
+        if future is None:
+            return []
+        try:
+            return future.result(timeout=deadline.budget() if deadline else None)
+        except FutureTimeout:
+            return []
+        except Exception:
+            logger.warning("Image retrieval failed; answering without images", exc_info=True)
+            return []
+
+    def retrieve_images(
+        self, query: str, top_k: int | None = None, deadline: Deadline | None = None
+    ) -> List[ImageHit]:
+        """Diagram evidence via CLIP; only touched when a request asks for images."""
+        if deadline is not None and deadline.expired:
+            return []
+        return self.await_images(self.start_image_search(query, top_k), deadline)
 
     def _collect_evidence_ids(
         self, context_items: List[RetrievedItem]
@@ -171,7 +321,10 @@ class GraphRAGService:
         return element_ids, legacy_ids
 
     def extract_evidence_subgraph(
-        self, query: str, context_items: List[RetrievedItem]
+        self,
+        query: str,
+        context_items: List[RetrievedItem],
+        deadline: Deadline | None = None,
     ) -> Tuple[list[dict], list[dict]]:
         """
         TEMPORARY: This is a very basic implementation. Depending on your Neo4j schema and how you store nodes/edges,
@@ -179,6 +332,12 @@ class GraphRAGService:
         """
         element_ids, legacy_ids = self._collect_evidence_ids(context_items)
 
+        snapshot = self.graph_snapshot  # may be swapped by the refresher mid-call
+        if snapshot is not None:
+            seeds = snapshot.seeds(element_ids, legacy_ids)
+            if seeds:
+                return snapshot.expand(seeds, hops=self.snapshot_hops)
+
         if element_ids or legacy_ids:
             cypher = """
             MATCH (n)
@@ -207,8 +366,20 @@ class GraphRAGService:
             """
             params = {"q": query}
 
-        with self.neo4j.driver.session() as session:
-            rows = list(session.run(cypher, params))
+        # Neo4j treats a timeout of 0 as "no timeout", so an exhausted budget must not reach it.
+        timeout = deadline.budget(self.budgets.subgraph_s) if deadline else None
+        if timeout is not None and timeout <= 0:
+            raise DeadlineExceeded("subgraph")
+
+        try:
+            with self.neo4j.driver.session() as session:
+                rows = list(session.run(Query(cypher, timeout=timeout), params))
+        except (ServiceUnavailable, SessionExpired):
+            if snapshot is None:
+                raise
+            # Neo4j dropped after retrieval succeeded: match on the snapshot's labels instead.
+            seeds = snapshot.match_labels(query)
+            return snapshot.expand(seeds, hops=self.snapshot_hops)
 
         nodes: dict[str, dict] = {}
         edges: list[dict] = []
@@ -245,7 +416,7 @@ class GraphRAGService:
 
         return list(nodes.values()), edges
 
-    def generate_answer(self, query: str, context_items: List[RetrievedItem]) -> str:
+    def _build_prompt(self, query: str, context_items: List[RetrievedItem]) -> str:
         context_block = "\n\n".join(
             [f"[Evidence {i+1}] {item.text}" for i, item in enumerate(context_items)]
         )
@@ -266,19 +437,105 @@ Include:
 - muscles/joints involved (if present in evidence)
 - 1-2 safety notes (generic, non-clinical)
 """
+        return prompt
+
+    def _generate(self, model: str, prompt: str, timeout_s: float | None) -> str:
+        config = None
+        if timeout_s is not None:
+            # HttpOptions.timeout is in milliseconds.
+            config = types.GenerateContentConfig(
+                http_options=types.HttpOptions(timeout=max(1, int(timeout_s * 1000)))
+            )
 
         # Gemini API quickstart uses generateContent. :contentReference[oaicite:9]{index=9}
         resp = self.gemini.models.generate_content(
-            model=self.gemini_model,
+            model=model,
             contents=prompt,
+            config=config,
         )
         # SDK typically returns resp.text
         return getattr(resp, "text", str(resp))
 
-    def query(self, query: str, mode: str = "vector") -> tuple[str, list[str], list[dict], list[dict]]:
-        retrieved = self.retrieve(query, mode=mode)
-        answer = self.generate_answer(query, retrieved)
+    def _evidence_only_answer(self, context_items: List[RetrievedItem]) -> str:
+        if not context_items:
+            return "The assistant could not generate an answer in time and found no supporting evidence."
+        evidence = " ".join(f"[Evidence {i+1}] {item.text}" for i, item in enumerate(context_items))
+        return f"The assistant could not generate an answer in time. The most relevant evidence is: {evidence}"
+
+    def generate_answer(
+        self,
+        query: str,
+        context_items: List[RetrievedItem],
+        deadline: Deadline | None = None,
+    ) -> str:
+        """
+        Hedged generation: the primary model gets `hedge_after_s`; if it has not answered
+        (or has failed) by then, the fallback model is started and the first successful
+        response wins. When the generation budget runs out, return evidence only.
+        """
+        prompt = self._build_prompt(query, context_items)
+        stage = Deadline((deadline or Deadline(None)).budget(self.budgets.generation_s))
+        if stage.expired:
+            if self.evidence_only_fallback:
+                return self._evidence_only_answer(context_items)
+            raise DeadlineExceeded("generation")
+
+        futures: list[Future] = [
+            self._executor.submit(self._generate, self.gemini_model, prompt, stage.budget())
+        ]
+        error: BaseException | None = None
+
+        while True:
+            pending = [f for f in futures if not f.done()]
+            can_hedge = self.fallback_gemini_model is not None and len(futures) == 1
+            if not pending and not can_hedge:
+                break
+
+            if pending:
+                timeout = stage.budget(self.budgets.hedge_after_s if can_hedge else None)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                    error = future.exception()
+
+            if stage.expired:
+                break
+            if can_hedge:
+                futures.append(
+                    self._executor.submit(
+                        self._generate, self.fallback_gemini_model, prompt, stage.budget()
+                    )
+                )
+
+        if error is not None and not stage.expired:
+            raise error
+        if self.evidence_only_fallback:
+            return self._evidence_only_answer(context_items)
+        raise DeadlineExceeded("generation")
+
+    def _await_subgraph(
+        self, future: Future, deadline: Deadline
+    ) -> Tuple[list[dict], list[dict]]:
+        """The evidence graph is supplementary: on timeout, answer without it."""
+        try:
+            return future.result(timeout=deadline.budget())
+        except (FutureTimeout, DeadlineExceeded):
+            return [], []
+        except Neo4jError as e:
+            if "TransactionTimedOut" in (e.code or ""):
+                return [], []
+            raise
+
+    def query(
+        self, query: str, mode: str = "vector", deadline: Deadline | None = None
+    ) -> tuple[str, list[str], list[dict], list[dict]]:
+        deadline = deadline or Deadline(self.budgets.request_s)
+        retrieved = self.retrieve(query, mode=mode, deadline=deadline)
+        # Subgraph expansion only needs the retrieved ids, so it overlaps with generation.
+        subgraph = self._executor.submit(self.extract_evidence_subgraph, query, retrieved, deadline)
+        answer = self.generate_answer(query, retrieved, deadline=deadline)
         answer = " ".join(answer.splitlines()).strip()
-        nodes, edges = self.extract_evidence_subgraph(query, retrieved)
+        nodes, edges = self._await_subgraph(subgraph, deadline)
         raw_context = [x.text for x in retrieved]
         return answer, raw_context, nodes, edges
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, List
+
+import numpy as np
+
+VECTORS_FILE = "vectors.npy"
+META_FILE = "meta.json"
+
+
+@dataclass
+class ImageHit:
+    id: str
+    path: str
+    caption: str | None
+    score: float
+
+
+class ImageVectorStore:
+    """
+    Read-only diagram embeddings stored as a float32 .npy matrix plus a JSON sidecar.
+
+    The matrix is opened with mmap_mode="r", so every worker process maps the same file
+    and the OS page cache holds a single copy. Rows are L2-normalised at build time,
+    which makes a dot product equal to cosine similarity.
+    """
+
+    def __init__(self, index_dir: str | Path):
+        self.index_dir = Path(index_dir)
+        meta = json.loads((self.index_dir / META_FILE).read_text(encoding="utf-8"))
+        self.model: str = meta["model"]
+        self.ids: list[str] = meta["ids"]
+        self.paths: list[str] = meta["paths"]
+        self.captions: list[str | None] = meta.get("captions") or [None] * len(self.ids)
+        self.vectors = np.load(self.index_dir / VECTORS_FILE, mmap_mode="r")
+
+        if self.vectors.shape[0] != len(self.ids):
+            raise ValueError(
+                f"Image index at {self.index_dir} is inconsistent: "
+                f"{self.vectors.shape[0]} vectors, {len(self.ids)} ids"
+            )
+
+    @property
+    def dimensions(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def search(self, query_vector: np.ndarray, top_k: int) -> List[ImageHit]:
+        if not self.ids:
+            return []
+        scores = self.vectors @ query_vector.astype(np.float32)
+        k = min(top_k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            ImageHit(id=self.ids[i], path=self.paths[i], caption=self.captions[i], score=float(scores[i]))
+            for i in top
+        ]
+
+
+class ImageRetriever:
+    """
+    Text-to-diagram retrieval. Neither the CLIP text encoder nor the vector file is
+    loaded until the first query that asks for images, so text-only traffic never
+    pays for the second model.
+
+    The vector store is reopened when meta.json's mtime changes, so a rebuilt index is
+    picked up without restarting workers. The CLIP model is loaded once.
+    """
+
+    def __init__(self, index_dir: str | Path, model_name: str = "clip-ViT-B-32", top_k: int = 3):
+        self.index_dir = Path(index_dir)
+        self.model_name = model_name
+        self.top_k = top_k
+        self._store: ImageVectorStore | None = None
+        self._store_mtime: int | None = None
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return (self.index_dir / VECTORS_FILE).exists() and (self.index_dir / META_FILE).exists()
+
+    def _load(self) -> tuple[ImageVectorStore, Any]:
+        # meta.json is swapped in after vectors.npy, so its mtime marks a complete rebuild.
+        mtime = (self.index_dir / META_FILE).stat().st_mtime_ns
+        if self._model is None or mtime != self._store_mtime:
+            with self._lock:
+                if self._model is None or mtime != self._store_mtime:
+                    store = ImageVectorStore(self.index_dir)
+                    if store.model != self.model_name:
+                        raise ValueError(
+                            f"Image index was built with {store.model}, but CLIP model is {self.model_name}"
+                        )
+                    if self._model is None:
+                        from sentence_transformers import SentenceTransformer
+
+                        self._model = SentenceTransformer(self.model_name, device="cpu")
+                    self._store, self._store_mtime = store, mtime
+        return self._store, self._model
+
+    def search(self, query: str, top_k: int | None = None) -> List[ImageHit]:
+        if not self.available:
+            return []
+        store, model = self._load()
+        query_vector = model.encode(query, normalize_embeddings=True)
+        return store.search(np.asarray(query_vector), top_k or self.top_k)
+
+
+def build_image_index(
+    images: Iterable[tuple[str, str, str | None]],
+    index_dir: str | Path,
+    model_name: str = "clip-ViT-B-32",
+    batch_size: int = 32,
+) -> int:
+    """
+    Offline: embed (id, path, caption) images in batches with the CLIP image encoder and
+    write them straight into a memory-mapped .npy, so the full matrix never sits in RAM.
+
+    Files are written under temporary names and swapped in with os.replace (vectors first,
+    then meta.json); running ImageRetrievers reopen the index on their next search.
+    """
+    from PIL import Image
+    from sentence_transformers import SentenceTransformer
+
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    entries = list(images)
+
+    model = SentenceTransformer(model_name, device="cpu")
+    dims = model.get_sentence_embedding_dimension()
+    if dims is None:
+        dims = int(model.encode("dimension probe").shape[-1])
+
+    tmp_vectors = index_dir / f"{VECTORS_FILE}.tmp"
+    out = np.lib.format.open_memmap(tmp_vectors, mode="w+", dtype=np.float32, shape=(len(entries), dims))
+
+    for start in range(0, len(entries), batch_size):
+        batch = entries[start : start + batch_size]
+        pil_images = []
+        for _, path, _ in batch:
+            with Image.open(path) as img:
+                pil_images.append(img.convert("RGB"))
+        out[start : start + len(batch)] = model.encode(
+            pil_images, batch_size=batch_size, normalize_embeddings=True
+        )
+    out.flush()
+    del out
+
+    meta = {
+        "model": model_name,
+        "ids": [e[0] for e in entries],
+        "paths": [e[1] for e in entries],
+        "captions": [e[2] for e in entries],
+    }
+    tmp_meta = index_dir / f"{META_FILE}.tmp"
+    tmp_meta.write_text(json.dumps(meta), encoding="utf-8")
+
+    os.replace(tmp_vectors, index_dir / VECTORS_FILE)
+    os.replace(tmp_meta, index_dir / META_FILE)
+    return len(entries)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class MemoryChunk:
+    id: str
+    text: str
+    embedding: list[float]
+    properties: dict[str, Any] = field(default_factory=dict)
+
+
+class InMemoryChunkStore:
+    """
+    Small in-process stand-in for the Neo4j chunk indexes.
+
+    Holds (id, text, embedding) triples and exposes retrievers with the same
+    `get_search_results(query_text=..., top_k=...)` contract as neo4j-graphrag, returning records
+    shaped like VectorRetriever's default output so `GraphRAGService._format_retrieval`
+    treats them identically.
+    """
+
+    def __init__(self, embedder: Any, chunks: List[MemoryChunk] | None = None):
+        self.embedder = embedder
+        self.chunks: List[MemoryChunk] = list(chunks or [])
+
+    @classmethod
+    def from_json(cls, path: str | Path, embedder: Any) -> "InMemoryChunkStore":
+        """
+        Load chunks from a JSON list of {"id", "text", "embedding"?, ...}.
+        Missing embeddings are computed with the given embedder.
+        """
+        rows = json.loads(Path(path).read_text(encoding="utf-8"))
+        chunks: List[MemoryChunk] = []
+        for row in rows:
+            row = dict(row)
+            cid = str(row.pop("id"))
+            text = row.pop("text")
+            embedding = row.pop("embedding", None) or embedder.embed_query(text)
+            chunks.append(MemoryChunk(id=cid, text=text, embedding=list(embedding), properties=row))
+        return cls(embedder, chunks)
+
+    def _record(self, chunk: MemoryChunk, score: float) -> dict[str, Any]:
+        element_id = f"mem:{chunk.id}"
+        return {
+            "node": {"id": chunk.id, "text": chunk.text, **chunk.properties},
+            "nodeLabels": ["Chunk"],
+            "elementId": element_id,
+            "id": element_id,
+            "score": score,
+        }
+
+    def vector_scores(
+        self, query_text: str | None = None, query_vector: list[float] | None = None
+    ) -> dict[str, float]:
+        if query_vector is None:
+            query_vector = self.embedder.embed_query(query_text)
+        return {c.id: _cosine(query_vector, c.embedding) for c in self.chunks}
+
+    def fulltext_scores(self, query_text: str) -> dict[str, float]:
+        terms = set(_tokenize(query_text))
+        scores: dict[str, float] = {}
+        for c in self.chunks:
+            tokens = _tokenize(c.text)
+            hits = sum(1 for t in tokens if t in terms)
+            if hits:
+                scores[c.id] = hits / math.sqrt(len(tokens))
+        return scores
+
+    def _top(self, scores: dict[str, float], top_k: int) -> tuple[list[dict], dict]:
+        by_id = {c.id: c for c in self.chunks}
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+        return [self._record(by_id[cid], score) for cid, score in ranked], {}
+
+    def vector_retriever(self) -> "InMemoryRetriever":
+        return InMemoryRetriever(self, hybrid=False)
+
+    def hybrid_retriever(self) -> "InMemoryRetriever":
+        return InMemoryRetriever(self, hybrid=True)
+
+
+class InMemoryRetriever:
+    """
+    Mirrors VectorRetriever / HybridRetriever. Hybrid mode follows neo4j-graphrag:
+    each score list is divided by its max, and a chunk keeps its best normalised score.
+    """
+
+    def __init__(self, store: InMemoryChunkStore, hybrid: bool = False):
+        self.store = store
+        self.hybrid = hybrid
+
+    def get_search_results(
+        self,
+        query_text: str | None = None,
+        query_vector: list[float] | None = None,
+        top_k: int = 5,
+        **kwargs: Any,
+    ) -> tuple[list[dict], dict]:
+        scores = self.store.vector_scores(query_text, query_vector)
+        if self.hybrid and query_text:
+            merged: dict[str, float] = {}
+            for part in (scores, self.store.fulltext_scores(query_text)):
+                top = max(part.values(), default=0.0)
+                if top <= 0:
+                    continue
+                for cid, score in part.items():
+                    merged[cid] = max(merged.get(cid, 0.0), score / top)
+            scores = merged
+        return self.store._top(scores, top_k)
@@ -1,4 +1,12 @@
-from neo4j import GraphDatabase, Driver
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from neo4j import GraphDatabase, Driver, Query
+
+_tx_timeout: ContextVar[float | None] = ContextVar("neo4j_tx_timeout", default=None)
 
 
 class Neo4jClient:
@@ -10,5 +18,41 @@ class Neo4jClient:
     def driver(self) -> Driver:
         return self._driver
 
+    @property
+    def database(self) -> str | None:
+        return self._database
+
     def close(self) -> None:
         self._driver.close()
+
+
+@contextmanager
+def transaction_timeout(seconds: float | None) -> Iterator[None]:
+    """Bound every query sent through a TimedDriver in this context to `seconds`."""
+    token = _tx_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _tx_timeout.reset(token)
+
+
+class TimedDriver:
+    """
+    Delegates to a neo4j Driver, but sends execute_query as Query(..., timeout=...) using
+    the current transaction_timeout(). neo4j-graphrag retrievers take no timeout and only
+    search via driver.execute_query, so swapping their `.driver` for this lets Neo4j kill
+    a search that outlives its budget instead of leaving it running server-side.
+    """
+
+    def __init__(self, driver: Driver):
+        self._driver = driver
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._driver, name)
+
+    def execute_query(self, query_: Any, *args: Any, **kwargs: Any) -> Any:
+        timeout = _tx_timeout.get()
+        if timeout is not None and not isinstance(query_, Query):
+            # Neo4j treats 0 as "no timeout", so never round a spent budget down to it.
+            query_ = Query(query_, timeout=max(timeout, 0.001))
+        return self._driver.execute_query(query_, *args, **kwargs)
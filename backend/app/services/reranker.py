@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import inspect
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .graphrag_service import RetrievedItem
+
+
+def _node_properties(item: RetrievedItem) -> dict[str, Any]:
+    data = item.metadata or {}
+    node = data.get("node")
+    return node if hasattr(node, "get") else data
+
+
+class CrossEncoderReranker:
+    """
+    Second-stage ordering for retrieved chunks.
+
+    A small cross-encoder scores every (query, chunk) pair in one batched CPU call, and
+    the result is blended with a precomputed node-importance property (PageRank/degree,
+    see compute_centrality.py) read from the chunk node:
+
+        score = (1 - prior_weight) * relevance + prior_weight * prior / max(prior)
+
+    Pair scores are cached (LRU), so repeated questions skip the model entirely.
+    The model is loaded on first use.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        prior_property: str | None = "pagerank",
+        prior_weight: float = 0.2,
+        cache_size: int = 4096,
+    ):
+        self.model_name = model_name
+        self.prior_property = prior_property
+        self.prior_weight = prior_weight if prior_property else 0.0
+        self.cache_size = cache_size
+
+        self._model: Any = None
+        self._predict_kwargs: dict[str, Any] = {}
+        self._load_lock = threading.Lock()
+        self._cache: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _load(self) -> Any:
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    import torch
+                    from sentence_transformers import CrossEncoder
+
+                    model = CrossEncoder(self.model_name, device="cpu")
+                    if getattr(model, "num_labels", 1) != 1:
+                        raise ValueError(
+                            f"Rerank model {self.model_name} has {model.num_labels} labels; "
+                            "a single-score cross-encoder is required"
+                        )
+                    # Library versions disagree on the default activation (identity vs sigmoid),
+                    # so pick it once here: every score, cached or not, is sigmoid(logit).
+                    params = inspect.signature(model.predict).parameters
+                    name = "activation_fn" if "activation_fn" in params else "activation_fct"
+                    self._predict_kwargs = {name: torch.nn.Sigmoid()}
+                    self._model = model
+        return self._model
+
+    def _cached(self, key: tuple[str, str]) -> float | None:
+        with self._cache_lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _store(self, key: tuple[str, str], score: float) -> None:
+        with self._cache_lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def relevance(self, query: str, texts: List[str]) -> List[float]:
+        """Cross-encoder relevance in [0, 1]; uncached pairs are scored in a single batch."""
+        scores: list[float | None] = [self._cached((query, t)) for t in texts]
+        missing = [i for i, s in enumerate(scores) if s is None]
+
+        if missing:
+            model = self._load()
+            probs = model.predict(
+                [(query, texts[i]) for i in missing],
+                batch_size=len(missing),
+                show_progress_bar=False,
+                **self._predict_kwargs,
+            )
+            for i, prob in zip(missing, probs):
+                score = float(prob)
+                scores[i] = score
+                self._store((query, texts[i]), score)
+
+        return [float(s) for s in scores]
+
+    def _priors(self, items: List[RetrievedItem]) -> List[float]:
+        if not self.prior_property:
+            return [0.0] * len(items)
+        raw = []
+        for item in items:
+            val = _node_properties(item).get(self.prior_property)
+            raw.append(float(val) if isinstance(val, (int, float)) else 0.0)
+        top = max(raw, default=0.0)
+        return [v / top for v in raw] if top > 0 else [0.0] * len(items)
+
+    def rerank(self, query: str, items: List[RetrievedItem], top_k: int) -> List[RetrievedItem]:
+        if not items:
+            return []
+        relevance = self.relevance(query, [item.text for item in items])
+        priors = self._priors(items)
+        w = self.prior_weight
+
+        scored = [
+            replace(item, score=(1.0 - w) * rel + w * prior)
+            for item, rel, prior in zip(items, relevance, priors)
+        ]
+        scored.sort(key=lambda item: item.score, reverse=True)
+        return scored[:top_k]
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, List, Sequence
+
+from .graphrag_service import GraphRAGService, RetrievedItem
+
+
+@dataclass
+class GoldenQuestion:
+    question: str
+    relevant_ids: list[str]
+
+
+@dataclass
+class EvalResult:
+    mode: str
+    top_k: int
+    recall: float
+    mrr: float
+    p50_ms: float
+    p95_ms: float
+    queries: int
+
+
+def load_golden_set(path: str | Path) -> List[GoldenQuestion]:
+    """
+    Golden sets are JSONL (or a JSON list) of {"question": str, "relevant_ids": [chunk ids]}.
+    """
+    raw = Path(path).read_text(encoding="utf-8").strip()
+    if raw.startswith("["):
+        rows = json.loads(raw)
+    else:
+        rows = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    return [
+        GoldenQuestion(question=r["question"], relevant_ids=[str(x) for x in r["relevant_ids"]])
+        for r in rows
+    ]
+
+
+def chunk_id(item: RetrievedItem) -> str | None:
+    """
+    The chunk's own `id` property, not the Neo4j elementId.
+    VectorRetriever nests node properties under `node`, so look there first.
+    """
+    data = item.metadata or {}
+    node = data.get("node")
+    if hasattr(node, "get"):
+        val = node.get("id")
+        if val is not None:
+            return str(val)
+    val = data.get("chunk_id")
+    return str(val) if val is not None else None
+
+
+def recall_at_k(retrieved: Sequence[str | None], relevant: Iterable[str]) -> float:
+    relevant = set(relevant)
+    if not relevant:
+        return 0.0
+    return len(relevant.intersection(retrieved)) / len(relevant)
+
+
+def reciprocal_rank(retrieved: Sequence[str | None], relevant: Iterable[str]) -> float:
+    relevant = set(relevant)
+    for rank, cid in enumerate(retrieved, start=1):
+        if cid in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile; good enough for a few hundred samples."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def evaluate(
+    service: GraphRAGService,
+    golden: List[GoldenQuestion],
+    modes: Sequence[str] = ("vector", "hybrid"),
+    top_ks: Sequence[int] = (3, 5, 10),
+    repeats: int = 1,
+) -> List[EvalResult]:
+    """
+    Sweep every (mode, top_k) pair over the golden set, timing each `service.retrieve` call.
+    One untimed warm-up call per mode keeps model loading out of the latency numbers.
+    """
+    results: List[EvalResult] = []
+    for mode in modes:
+        if golden:
+            service.retrieve(golden[0].question, mode=mode, top_k=max(top_ks))
+
+        for k in top_ks:
+            recalls: list[float] = []
+            rrs: list[float] = []
+            latencies: list[float] = []
+
+            for q in golden:
+                for _ in range(max(1, repeats)):
+                    start = time.perf_counter()
+                    items = service.retrieve(q.question, mode=mode, top_k=k)
+                    latencies.append((time.perf_counter() - start) * 1000.0)
+
+                ids = [chunk_id(item) for item in items[:k]]
+                recalls.append(recall_at_k(ids, q.relevant_ids))
+                rrs.append(reciprocal_rank(ids, q.relevant_ids))
+
+            n = len(golden) or 1
+            results.append(
+                EvalResult(
+                    mode=mode,
+                    top_k=k,
+                    recall=sum(recalls) / n,
+                    mrr=sum(rrs) / n,
+                    p50_ms=percentile(latencies, 50),
+                    p95_ms=percentile(latencies, 95),
+                    queries=len(golden),
+                )
+            )
+    return results
+
+
+def recommend(
+    results: List[EvalResult], min_recall: float = 0.0, min_mrr: float = 0.0
+) -> EvalResult | None:
+    """
+    Cheapest configuration meeting the quality bar: smallest top_k (smaller prompts),
+    then lowest p95 latency.
+    """
+    passing = [r for r in results if r.recall >= min_recall and r.mrr >= min_mrr]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (r.top_k, r.p95_ms))
+
+
+def format_table(results: List[EvalResult]) -> str:
+    header = f"{'mode':<8} {'top_k':>5} {'recall@k':>9} {'MRR':>6} {'p50 ms':>8} {'p95 ms':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.mode:<8} {r.top_k:>5} {r.recall:>9.3f} {r.mrr:>6.3f} {r.p50_ms:>8.1f} {r.p95_ms:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def to_json(results: List[EvalResult], best: EvalResult | None = None) -> dict[str, Any]:
+    return {
+        "results": [asdict(r) for r in results],
+        "recommended": asdict(best) if best else None,
+    }
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List
+
+from neo4j_graphrag.indexes import create_fulltext_index, create_vector_index
+
+from .neo4j_client import Neo4jClient
+from .sharding import Shard
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMUP_QUERIES = ("knee pain exercises", "squat form and safety")
+
+
+class SchemaMismatchError(ValueError):
+    """The vector index exists but was built for a different embedding size."""
+
+
+class MissingIndexError(LookupError):
+    """A vector index is still missing after the bootstrapper tried to create it."""
+
+
+@dataclass
+class BootstrapReport:
+    vector_dimensions: int
+    statements: List[str] = field(default_factory=list)
+    missing_indexes: List[str] = field(default_factory=list)
+    warmed_queries: int = 0
+    elapsed_ms: float = 0.0
+
+
+class SchemaBootstrapper:
+    """
+    Idempotent schema setup and cache warm-up for the chunk store.
+
+    - a uniqueness constraint on :Chunk(id), which also gives MERGE an index lookup
+      instead of a label scan
+    - the vector and fulltext indexes used by GraphRAGService, including per-domain
+      shard indexes (IF NOT EXISTS)
+    - range indexes on the graph snapshot's change marker (`updated_at`) for each change
+      label, so the snapshot refresh is an index seek rather than a scan of every node
+    - a check that every vector index's dimensions match the embedder
+    - one pass over the service's retrieval and subgraph Cypher so Neo4j has the plans
+      cached and the index/store pages resident before real traffic arrives
+    """
+
+    def __init__(
+        self,
+        neo4j_client: Neo4jClient,
+        embedder: Any,
+        vector_index_name: str,
+        fulltext_index_name: str,
+        chunk_label: str = "Chunk",
+        embedding_property: str = "embedding",
+        text_properties: Iterable[str] = ("text",),
+        similarity_fn: str = "cosine",
+        shards: List[Shard] | None = None,
+        change_labels: Iterable[str] = (),
+        updated_property: str = "updated_at",
+    ):
+        self.neo4j = neo4j_client
+        self.embedder = embedder
+        self.vector_index_name = vector_index_name
+        self.fulltext_index_name = fulltext_index_name
+        self.chunk_label = chunk_label
+        self.embedding_property = embedding_property
+        self.text_properties = list(text_properties)
+        self.similarity_fn = similarity_fn
+        self.shards = list(shards or [])
+        self.change_labels = list(change_labels)
+        self.updated_property = updated_property
+
+    def _run(self, cypher: str, **params: Any) -> list:
+        with self.neo4j.driver.session(database=self.neo4j.database) as session:
+            return list(session.run(cypher, params))
+
+    def embedding_dimensions(self) -> int:
+        return len(self.embedder.embed_query("dimension probe"))
+
+    def ensure_constraints(self) -> List[str]:
+        name = f"{self.chunk_label.lower()}_id_unique"
+        cypher = (
+            f"CREATE CONSTRAINT `{name}` IF NOT EXISTS "
+            f"FOR (c:`{self.chunk_label}`) REQUIRE c.id IS UNIQUE"
+        )
+        self._run(cypher)
+        return [cypher]
+
+    def ensure_change_indexes(self) -> List[str]:
+        statements: List[str] = []
+        for label in self.change_labels:
+            name = f"{label.lower()}_{self.updated_property}"
+            cypher = (
+                f"CREATE INDEX `{name}` IF NOT EXISTS "
+                f"FOR (n:`{label}`) ON (n.`{self.updated_property}`)"
+            )
+            self._run(cypher)
+            statements.append(cypher)
+        return statements
+
+    def _index_specs(self) -> List[tuple[str, str | None, str]]:
+        """(vector index, fulltext index, label) for the global index and every shard."""
+        specs = [(self.vector_index_name, self.fulltext_index_name, self.chunk_label)]
+        specs += [(s.vector_index, s.fulltext_index, s.label) for s in self.shards]
+        return specs
+
+    def ensure_indexes(self, dimensions: int) -> List[str]:
+        created: List[str] = []
+        for vector_name, fulltext_name, label in self._index_specs():
+            create_vector_index(
+                self.neo4j.driver,
+                name=vector_name,
+                label=label,
+                embedding_property=self.embedding_property,
+                dimensions=dimensions,
+                similarity_fn=self.similarity_fn,
+                fail_if_exists=False,
+                neo4j_database=self.neo4j.database,
+            )
+            created.append(f"vector index {vector_name} on :{label} ({dimensions} dims)")
+            if fulltext_name:
+                create_fulltext_index(
+                    self.neo4j.driver,
+                    name=fulltext_name,
+                    label=label,
+                    node_properties=self.text_properties,
+                    fail_if_exists=False,
+                    neo4j_database=self.neo4j.database,
+                )
+                created.append(f"fulltext index {fulltext_name} on :{label}")
+        return created
+
+    def verify_vector_dimensions(self, expected: int) -> List[str]:
+        """
+        Raise SchemaMismatchError if an existing vector index has the wrong dimensions.
+        Returns the names of vector indexes that do not exist.
+        """
+        missing: List[str] = []
+        for vector_name, _, _ in self._index_specs():
+            rows = self._run(
+                "SHOW VECTOR INDEXES YIELD name, options WHERE name = $name RETURN options",
+                name=vector_name,
+            )
+            if not rows:
+                missing.append(vector_name)
+                continue
+
+            config = (rows[0]["options"] or {}).get("indexConfig", {})
+            actual = config.get("vector.dimensions")
+            if actual is not None and int(actual) != expected:
+                raise SchemaMismatchError(
+                    f"Vector index {vector_name} has {actual} dimensions, "
+                    f"but the embedder produces {expected}"
+                )
+        return missing
+
+    def await_indexes(self, timeout_s: int = 300) -> None:
+        self._run("CALL db.awaitIndexes($timeout)", timeout=timeout_s)
+
+    def warm_up(self, service: Any, queries: Iterable[str] = DEFAULT_WARMUP_QUERIES) -> int:
+        """
+        Run each retrieval mode and both subgraph queries (evidence-id and text-match paths)
+        once per warm-up query, then touch the chunk store so its pages are cached.
+        Each shard also gets one query built from its first keyword so the router sends
+        traffic to it. Returns the number of warm-up queries that warmed at least one path.
+
+        Each mode and the text-match subgraph are warmed independently, so one failing
+        path (e.g. no fulltext index for hybrid) does not skip the rest.
+        """
+        shard_queries = [s.keywords[0] for s in self.shards if s.keywords]
+        count = 0
+        for query in [*queries, *shard_queries]:
+            warmed = False
+            for mode in ("vector", "hybrid"):
+                try:
+                    items = service.retrieve(query, mode=mode)
+                    service.extract_evidence_subgraph(query, items)
+                    warmed = True
+                except Exception as e:
+                    logger.warning("Warm-up %s retrieval failed for %r: %s", mode, query, e)
+            try:
+                service.extract_evidence_subgraph(query, [])
+                warmed = True
+            except Exception as e:
+                logger.warning("Warm-up text-match subgraph failed for %r: %s", query, e)
+            if warmed:
+                count += 1
+
+        self._run(
+            f"MATCH (c:`{self.chunk_label}`) "
+            f"RETURN count(c.`{self.embedding_property}`) AS embeddings, count(c.id) AS ids"
+        )
+        return count
+
+    def run(
+        self,
+        service_factory: Callable[[], Any] | None = None,
+        create: bool = True,
+        warmup_queries: Iterable[str] = DEFAULT_WARMUP_QUERIES,
+    ) -> BootstrapReport:
+        """
+        Create (optionally) and verify the schema, then warm up. The service is built by
+        `service_factory` only after the indexes exist, because neo4j-graphrag retrievers
+        fail to construct against a missing index.
+
+        A dimension mismatch always raises. Missing indexes raise only when `create` was
+        asked for; otherwise they are reported (the API can still start and the indexes
+        be created later), and warm-up is skipped if the global index is among them.
+        """
+        start = time.perf_counter()
+        dims = self.embedding_dimensions()
+        report = BootstrapReport(vector_dimensions=dims)
+
+        if create:
+            report.statements += self.ensure_constraints()
+            report.statements += self.ensure_indexes(dims)
+            report.statements += self.ensure_change_indexes()
+            self.await_indexes()
+        report.missing_indexes = self.verify_vector_dimensions(dims)
+        if report.missing_indexes:
+            if create:
+                raise MissingIndexError(
+                    f"Vector indexes still missing after creation: {', '.join(report.missing_indexes)}"
+                )
+            logger.warning(
+                "Vector indexes missing (run bootstrap_schema.py or set SCHEMA_BOOTSTRAP=true): %s",
+                ", ".join(report.missing_indexes),
+            )
+
+        if service_factory is not None and self.vector_index_name not in report.missing_indexes:
+            report.warmed_queries = self.warm_up(service_factory(), warmup_queries)
+
+        report.elapsed_ms = (time.perf_counter() - start) * 1000.0
+        logger.info(
+            "Schema bootstrap done in %.0f ms (%d dims, %d warm-up queries)",
+            report.elapsed_ms,
+            dims,
+            report.warmed_queries,
+        )
+        return report
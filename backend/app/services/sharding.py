@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, List
+
+from neo4j_graphrag.retrievers import HybridRetriever, VectorRetriever
+
+from .neo4j_client import TimedDriver
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal-rank-fusion constant (Cormack et al.); damps the gap between top ranks.
+RRF_K = 60
+
+
+@dataclass
+class Shard:
+    """
+    One per-domain index pair over its own node label (e.g. :KneeChunk), since Neo4j allows
+    a single vector index per label/property. Chunks keep their :Chunk label too.
+    """
+
+    name: str
+    vector_index: str
+    label: str
+    fulltext_index: str | None = None
+    keywords: list[str] = field(default_factory=list)
+    description: str | None = None
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ShardRouter:
+    """
+    Picks the shards worth searching for a query, with a weight per shard.
+
+    1. keyword hits (whole words/phrases, case-insensitive); weight = hits / best hits
+    2. otherwise, cosine similarity between the query embedding and each shard's
+       description embedding, kept if >= min_similarity
+    3. otherwise no shards, and the caller searches the global index
+
+    At most `max_fanout` shards are returned.
+    """
+
+    def __init__(
+        self, shards: List[Shard], embedder: Any, max_fanout: int = 2, min_similarity: float = 0.35
+    ):
+        self.shards = shards
+        self.embedder = embedder
+        self.max_fanout = max(1, max_fanout)
+        self.min_similarity = min_similarity
+        self._patterns = {
+            s.name: [re.compile(rf"\b{re.escape(k.lower())}\b") for k in s.keywords] for s in shards
+        }
+        self._descriptions: dict[str, list[float]] | None = None
+
+    def _description_vectors(self) -> dict[str, list[float]]:
+        if self._descriptions is None:
+            self._descriptions = {
+                s.name: self.embedder.embed_query(s.description) for s in self.shards if s.description
+            }
+        return self._descriptions
+
+    def route(self, query: str, query_vector: list[float]) -> List[tuple[Shard, float]]:
+        text = query.lower()
+        hits = {s.name: sum(1 for p in self._patterns[s.name] if p.search(text)) for s in self.shards}
+        best = max(hits.values(), default=0)
+        if best > 0:
+            ranked = sorted((s for s in self.shards if hits[s.name]), key=lambda s: -hits[s.name])
+            return [(s, hits[s.name] / best) for s in ranked[: self.max_fanout]]
+
+        descriptions = self._description_vectors()
+        sims = {
+            s.name: _cosine(query_vector, descriptions[s.name])
+            for s in self.shards
+            if s.name in descriptions
+        }
+        ranked = sorted(
+            (s for s in self.shards if sims.get(s.name, -1.0) >= self.min_similarity),
+            key=lambda s: -sims[s.name],
+        )[: self.max_fanout]
+        if not ranked:
+            return []
+        top = sims[ranked[0].name]
+        return [(s, sims[s.name] / top) for s in ranked]
+
+
+class ShardedRetriever:
+    """
+    Scatter-gather over the routed shards: the query is embedded once by `route()` and
+    each routed shard is searched in parallel. Records are de-duplicated by elementId and
+    merged as follows:
+
+    - vector mode: on the raw index score. Every shard index uses the same embedder and
+      similarity function, so cosine scores are comparable across shards.
+    - hybrid mode: by reciprocal rank fusion, sum of 1 / (RRF_K + rank). Hybrid scores are
+      normalised per index (every shard's top hit is 1.0), so they can't be compared.
+
+    The router weight only breaks ties; scaling by it would bury secondary shards.
+    A shard that fails to build or search is logged and skipped.
+
+    Per-shard retrievers are built on first use, because neo4j-graphrag retrievers fail to
+    construct until their index exists (see SchemaBootstrapper).
+    """
+
+    def __init__(
+        self,
+        router: ShardRouter,
+        retrievers: dict[str, dict[str, Any]] | None = None,
+        build: Callable[[Shard], dict[str, Any]] | None = None,
+        max_workers: int = 8,
+    ):
+        self.router = router
+        self.retrievers = dict(retrievers or {})
+        self._build = build
+        self._build_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard")
+
+    @classmethod
+    def from_neo4j(
+        cls, driver: Any, embedder: Any, router: ShardRouter, database: str | None = None
+    ) -> "ShardedRetriever":
+        def build(shard: Shard) -> dict[str, Any]:
+            vector = VectorRetriever(
+                driver=driver, index_name=shard.vector_index, embedder=embedder, neo4j_database=database
+            )
+            vector.driver = TimedDriver(vector.driver)
+            hybrid = vector
+            if shard.fulltext_index:
+                hybrid = HybridRetriever(
+                    driver=driver,
+                    vector_index_name=shard.vector_index,
+                    fulltext_index_name=shard.fulltext_index,
+                    embedder=embedder,
+                    neo4j_database=database,
+                )
+                hybrid.driver = TimedDriver(hybrid.driver)
+            return {"vector": vector, "hybrid": hybrid}
+
+        return cls(router, build=build)
+
+    def _retriever(self, shard: Shard, mode: str) -> Any:
+        retrievers = self.retrievers.get(shard.name)
+        if retrievers is None:
+            with self._build_lock:
+                retrievers = self.retrievers.get(shard.name)
+                if retrievers is None:
+                    if self._build is None:
+                        raise KeyError(f"No retrievers for shard {shard.name}")
+                    retrievers = self.retrievers[shard.name] = self._build(shard)
+        return retrievers[mode]
+
+    def _search_shard(
+        self, shard: Shard, mode: str, query: str, query_vector: list[float], top_k: int
+    ) -> list[dict]:
+        retriever = self._retriever(shard, mode)
+        if mode == "hybrid" and shard.fulltext_index:
+            raw = retriever.get_search_results(query_text=query, query_vector=query_vector, top_k=top_k)
+        else:
+            raw = retriever.get_search_results(query_vector=query_vector, top_k=top_k)
+
+        records = raw.records if hasattr(raw, "records") else raw[0]
+        return [dict(rec.data()) if hasattr(rec, "data") else dict(rec) for rec in records]
+
+    def route(self, query_text: str) -> tuple[List[tuple[Shard, float]], list[float]]:
+        """(shard, weight) pairs for the query, plus its embedding so callers never embed twice."""
+        query_vector = self.router.embedder.embed_query(query_text)
+        return self.router.route(query_text, query_vector), query_vector
+
+    def get_search_results(
+        self,
+        query_text: str,
+        routed: List[tuple[Shard, float]],
+        query_vector: list[float],
+        top_k: int = 5,
+        mode: str = "vector",
+    ) -> tuple[list[dict], dict] | None:
+        """
+        Merged (records, metadata) over the shards `route()` picked, or None when every
+        one of them failed, so the caller can fall back to the global index.
+        """
+        futures = [
+            (
+                shard,
+                weight,
+                # Each shard runs in a copy of the caller's context, so it inherits the
+                # caller's transaction_timeout().
+                self._executor.submit(
+                    contextvars.copy_context().run,
+                    self._search_shard,
+                    shard,
+                    mode,
+                    query_text,
+                    query_vector,
+                    top_k,
+                ),
+            )
+            for shard, weight in routed
+        ]
+
+        merged: dict[str, dict] = {}
+        weights: dict[str, float] = {}  # best router weight per record, the tie-break
+        failed: list[str] = []
+        for shard, weight, future in futures:
+            try:
+                records = future.result()
+            except Exception:
+                logger.warning("Shard %s search failed; skipping it", shard.name, exc_info=True)
+                failed.append(shard.name)
+                continue
+
+            records.sort(key=lambda r: r.get("score") or 0.0, reverse=True)
+            for rank, rec in enumerate(records, start=1):
+                raw_score = rec.get("score") or 0.0
+                score = 1.0 / (RRF_K + rank) if mode == "hybrid" else raw_score
+                key = rec.get("elementId") or rec.get("id") or str(rec.get("node"))
+                prev = merged.get(key)
+                if prev is not None and mode == "hybrid":
+                    prev["score"] += score
+                elif prev is None or (score, weight) > (prev["score"], weights[key]):
+                    merged[key] = {**rec, "score": score, "raw_score": raw_score, "shard": shard.name}
+                weights[key] = max(weights.get(key, 0.0), weight)
+
+        if len(failed) == len(routed):
+            return None
+
+        keys = sorted(merged, key=lambda k: (merged[k]["score"], weights[k]), reverse=True)[:top_k]
+        ranked = [merged[k] for k in keys]
+        return ranked, {"shards": [s.name for s, _ in routed if s.name not in failed], "failed_shards": failed}
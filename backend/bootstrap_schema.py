@@ -0,0 +1,57 @@
+"""
+Create the :Chunk(id) constraint and the vector/fulltext indexes if missing, check the
+vector index matches the embedder, and optionally warm Neo4j's plan and page caches.
+
+Example (from backend/):
+    python bootstrap_schema.py
+    python bootstrap_schema.py --no-warmup
+"""
+import argparse
+
+from app.config import get_settings
+from app.main import get_embedder, get_neo4j, get_service
+from app.services.schema_bootstrap import SchemaBootstrapper
+from app.services.sharding import Shard
+
+
+def main() -> None:
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description="Bootstrap Neo4j schema and warm caches")
+    parser.add_argument("--no-warmup", action="store_true", help="only create and verify schema")
+    parser.add_argument("--verify-only", action="store_true", help="do not create anything")
+    parser.add_argument("--warmup-query", action="append", dest="warmup_queries")
+    args = parser.parse_args()
+
+    # Schema first from a bare client: the service's retrievers need the indexes to exist.
+    neo4j = get_neo4j(settings)
+    try:
+        report = SchemaBootstrapper(
+            neo4j_client=neo4j,
+            embedder=get_embedder(),
+            vector_index_name=settings.vector_index_name,
+            fulltext_index_name=settings.fulltext_index_name,
+            shards=[Shard(**s) for s in settings.vector_shards],
+            change_labels=settings.graph_snapshot_change_labels,
+        ).run(
+            service_factory=None if args.no_warmup else (lambda: get_service(settings)),
+            create=not args.verify_only,
+            warmup_queries=args.warmup_queries or settings.warmup_queries,
+        )
+    finally:
+        neo4j.close()
+
+    for statement in report.statements:
+        print(f"ensured: {statement}")
+    for name in report.missing_indexes:
+        print(f"missing: vector index {name}")
+    print(
+        f"Vector dimensions: {report.vector_dimensions}; "
+        f"warm-up queries: {report.warmed_queries}; took {report.elapsed_ms:.0f} ms."
+    )
+    if report.missing_indexes:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
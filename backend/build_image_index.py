@@ -0,0 +1,46 @@
+"""
+Offline CLIP embedding of rehab diagrams into the memory-mapped image index.
+
+Example (from backend/):
+    python build_image_index.py --images-dir data/diagrams --captions data/diagrams/captions.json
+"""
+import argparse
+import json
+from pathlib import Path
+
+from app.config import get_settings
+from app.services.image_store import build_image_index
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp"}
+
+
+def main() -> None:
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description="Build the CLIP diagram index")
+    parser.add_argument("--images-dir", required=True)
+    parser.add_argument("--captions", help="optional JSON map of relative path (or file name) -> caption")
+    parser.add_argument("--out", default=settings.image_index_path)
+    parser.add_argument("--model", default=settings.clip_model)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    captions: dict[str, str] = {}
+    if args.captions:
+        captions = json.loads(Path(args.captions).read_text(encoding="utf-8"))
+
+    # Ids are paths relative to --images-dir, so same-named files in subfolders stay distinct.
+    images_dir = Path(args.images_dir)
+    images = []
+    for p in sorted(images_dir.rglob("*")):
+        if p.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        rel = p.relative_to(images_dir).as_posix()
+        images.append((rel, str(p), captions.get(rel, captions.get(p.name))))
+
+    count = build_image_index(images, args.out, model_name=args.model, batch_size=args.batch_size)
+    print(f"Indexed {count} images into {args.out}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Offline node-importance priors for reranking: computes PageRank or degree over the
+rehab graph and stores it on every node, in a property named after the algorithm unless
+--property says otherwise.
+
+Example (from backend/):
+    python compute_centrality.py
+    python compute_centrality.py --algorithm degree        # -> .degree
+"""
+import argparse
+
+from app.config import get_settings
+from app.services.centrality import degree, fetch_edges, pagerank, write_scores
+from app.services.neo4j_client import Neo4jClient
+
+
+def main() -> None:
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description="Compute graph-centrality priors")
+    parser.add_argument("--algorithm", choices=["pagerank", "degree"], default="pagerank")
+    parser.add_argument("--property", help="node property to write (default: the algorithm name)")
+    parser.add_argument("--directed", action="store_true", help="follow relationship direction")
+    args = parser.parse_args()
+
+    # Writing one algorithm's scores under the other's name would silently mislabel them.
+    prop = args.property or args.algorithm
+    other = {"pagerank": "degree", "degree": "pagerank"}[args.algorithm]
+    if prop == other:
+        parser.error(f"--algorithm {args.algorithm} cannot write to .{other}")
+
+    neo4j = Neo4jClient(
+        uri=settings.neo4j_uri,
+        user=settings.neo4j_user,
+        password=settings.neo4j_password,
+        database=settings.neo4j_database,
+    )
+    try:
+        edges = fetch_edges(neo4j)
+        if args.algorithm == "pagerank":
+            scores = pagerank(edges, directed=args.directed)
+        else:
+            scores = degree(edges, directed=args.directed)
+        written = write_scores(neo4j, scores, prop)
+    finally:
+        neo4j.close()
+
+    print(f"Wrote {args.algorithm} to .{prop} on {written} nodes ({len(edges)} relationships).")
+    if prop != settings.rerank_prior_property:
+        print(f"Set RERANK_PRIOR_PROPERTY={prop} for the reranker to use it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Retrieval quality-vs-latency sweep.
+
+Runs GraphRAGService.retrieve for each mode and top_k over a golden set and reports
+recall@k, MRR and p50/p95 latency.
+
+Examples (from backend/):
+    python eval_retrieval.py --golden data/golden_demo.jsonl --in-memory data/demo_chunks.json
+    python eval_retrieval.py --golden golden.jsonl --top-k 3 5 10 --min-recall 0.8 --json-out eval.json
+"""
+import argparse
+import json
+
+from neo4j_graphrag.embeddings.sentence_transformers import SentenceTransformerEmbeddings
+
+from app.config import get_settings
+from app.services.graphrag_service import GraphRAGService
+from app.services.memory_store import InMemoryChunkStore
+from app.services.neo4j_client import Neo4jClient
+from app.services.reranker import CrossEncoderReranker
+from app.services.retrieval_eval import evaluate, format_table, load_golden_set, recommend, to_json
+
+
+def build_service(args: argparse.Namespace) -> tuple[GraphRAGService, Neo4jClient | None]:
+    settings = get_settings()
+    embedder = SentenceTransformerEmbeddings(model="all-MiniLM-L6-v2")
+    # Retrieval only: generation is never called, so a placeholder key is fine.
+    api_key = settings.gemini_api_key or "retrieval-eval"
+    rerank = {}
+    if args.rerank:
+        rerank = {
+            "reranker": CrossEncoderReranker(
+                model_name=settings.rerank_model,
+                prior_property=settings.rerank_prior_property or None,
+                prior_weight=settings.rerank_prior_weight,
+            ),
+            "rerank_candidates": args.rerank_candidates or settings.rerank_candidates,
+        }
+
+    if args.in_memory:
+        store = InMemoryChunkStore.from_json(args.in_memory, embedder)
+        service = GraphRAGService(
+            neo4j_client=None,
+            gemini_api_key=api_key,
+            gemini_model=settings.gemini_model,
+            vector_index_name=args.vector_index or settings.vector_index_name,
+            fulltext_index_name=args.fulltext_index or settings.fulltext_index_name,
+            top_k=settings.top_k,
+            embedder=embedder,
+            retrievers={"vector": store.vector_retriever(), "hybrid": store.hybrid_retriever()},
+            **rerank,
+        )
+        return service, None
+
+    neo4j = Neo4jClient(
+        uri=settings.neo4j_uri,
+        user=settings.neo4j_user,
+        password=settings.neo4j_password,
+        database=settings.neo4j_database,
+    )
+    service = GraphRAGService(
+        neo4j_client=neo4j,
+        gemini_api_key=api_key,
+        gemini_model=settings.gemini_model,
+        vector_index_name=args.vector_index or settings.vector_index_name,
+        fulltext_index_name=args.fulltext_index or settings.fulltext_index_name,
+        top_k=settings.top_k,
+        embedder=embedder,
+        **rerank,
+    )
+    return service, neo4j
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Retrieval quality-vs-latency evaluation")
+    parser.add_argument("--golden", required=True, help="JSONL of {question, relevant_ids}")
+    parser.add_argument("--modes", nargs="+", default=["vector", "hybrid"], choices=["vector", "hybrid"])
+    parser.add_argument("--top-k", nargs="+", type=int, default=[3, 5, 10], dest="top_ks")
+    parser.add_argument("--repeats", type=int, default=1, help="timed calls per question")
+    parser.add_argument("--in-memory", help="JSON chunk file; evaluate without Neo4j")
+    parser.add_argument("--vector-index", help="override VECTOR_INDEX_NAME (compare index configs)")
+    parser.add_argument("--fulltext-index", help="override FULLTEXT_INDEX_NAME")
+    parser.add_argument("--rerank", action="store_true", help="apply the cross-encoder rerank stage")
+    parser.add_argument("--rerank-candidates", type=int, help="override RERANK_CANDIDATES")
+    parser.add_argument("--min-recall", type=float, default=0.0)
+    parser.add_argument("--min-mrr", type=float, default=0.0)
+    parser.add_argument("--json-out", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    golden = load_golden_set(args.golden)
+    service, neo4j = build_service(args)
+    try:
+        results = evaluate(service, golden, modes=args.modes, top_ks=args.top_ks, repeats=args.repeats)
+    finally:
+        if neo4j is not None:
+            neo4j.close()
+
+    best = recommend(results, min_recall=args.min_recall, min_mrr=args.min_mrr)
+
+    print(format_table(results))
+    if best:
+        print(f"\nCheapest config meeting the bar: mode={best.mode} top_k={best.top_k}")
+    else:
+        print("\nNo configuration meets the quality bar.")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(to_json(results, best), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
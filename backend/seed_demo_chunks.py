@@ -25,7 +25,8 @@ with GraphDatabase.driver(URI, auth=(USER, PWD)) as driver:
             """
             MERGE (c:Chunk {id: $id})
             SET c.text = $text,
-                c.embedding = $embedding
+                c.embedding = $embedding,
+                c.updated_at = timestamp()
             """,
             id=cid,
             text=text,
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The API is imported as `app` from backend/, the same way uvicorn and the CLI scripts run it.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
@@ -0,0 +1,145 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from app.services.admission import (
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    AdmissionController,
+    AdmissionRejected,
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_admits_immediately_under_capacity():
+    async def scenario():
+        ctl = AdmissionController(max_in_flight=2, max_queue=0, max_wait_s=1)
+        assert await ctl.acquire() == 0.0
+        assert await ctl.acquire() == 0.0
+        assert ctl.metrics()["in_flight"] == 2
+
+    run(scenario())
+
+
+def test_rejects_when_queue_full():
+    async def scenario():
+        ctl = AdmissionController(max_in_flight=1, max_queue=1, max_wait_s=5)
+        await ctl.acquire()
+        waiter = asyncio.create_task(ctl.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            await ctl.acquire()
+        assert exc.value.reason == "queue full"
+        assert exc.value.retry_after_s >= 1
+
+        ctl.release()
+        await waiter
+        assert ctl.metrics()["rejected_queue_full_total"] == 1
+
+    run(scenario())
+
+
+def test_rejects_after_max_wait_and_leaves_queue():
+    async def scenario():
+        ctl = AdmissionController(max_in_flight=1, max_queue=4, max_wait_s=0.05)
+        await ctl.acquire()
+
+        with pytest.raises(AdmissionRejected) as exc:
+            await ctl.acquire()
+        assert exc.value.reason == "queue wait exceeded"
+
+        metrics = ctl.metrics()
+        assert metrics["queued"] == 0
+        assert metrics["rejected_timeout_total"] == 1
+
+        # The timed-out waiter must not be handed the slot.
+        ctl.release()
+        assert ctl.metrics()["in_flight"] == 0
+
+    run(scenario())
+
+
+def test_high_priority_jumps_the_queue_fifo_within_priority():
+    async def scenario():
+        ctl = AdmissionController(max_in_flight=1, max_queue=8, max_wait_s=5)
+        await ctl.acquire()
+        order = []
+
+        async def request(name, priority):
+            await ctl.acquire(priority)
+            order.append(name)
+            ctl.release()
+
+        tasks = [
+            asyncio.create_task(request("normal-1", PRIORITY_NORMAL)),
+            asyncio.create_task(request("high-1", PRIORITY_HIGH)),
+            asyncio.create_task(request("normal-2", PRIORITY_NORMAL)),
+            asyncio.create_task(request("high-2", PRIORITY_HIGH)),
+        ]
+        await asyncio.sleep(0)
+        ctl.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["high-1", "high-2", "normal-1", "normal-2"]
+
+    run(scenario())
+
+
+def test_cancelled_waiter_leaves_queue_and_next_is_admitted():
+    async def scenario():
+        ctl = AdmissionController(max_in_flight=1, max_queue=4, max_wait_s=5)
+        await ctl.acquire()
+        gone = asyncio.create_task(ctl.acquire())
+        stays = asyncio.create_task(ctl.acquire())
+        await asyncio.sleep(0)
+
+        gone.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await gone
+        assert ctl.metrics()["queued"] == 1
+
+        ctl.release()
+        await stays
+        assert ctl.metrics()["in_flight"] == 1
+        assert ctl.metrics()["queued"] == 0
+
+    run(scenario())
+
+
+def test_cancel_racing_a_grant_does_not_leak_the_slot():
+    async def scenario():
+        ctl = AdmissionController(max_in_flight=1, max_queue=4, max_wait_s=5)
+        await ctl.acquire()
+
+        async def request():
+            async with ctl.admit():
+                pass
+
+        task = asyncio.create_task(request())
+        await asyncio.sleep(0)
+
+        ctl.release()  # hands the slot to `task`...
+        task.cancel()  # ...which is cancelled before it resumes
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        assert ctl.metrics()["in_flight"] == 0
+
+    run(scenario())
+
+
+def test_admit_context_releases_on_error():
+    async def scenario():
+        ctl = AdmissionController(max_in_flight=1, max_queue=0, max_wait_s=1)
+        with pytest.raises(RuntimeError):
+            async with ctl.admit():
+                raise RuntimeError("boom")
+        assert ctl.metrics()["in_flight"] == 0
+        async with ctl.admit():
+            assert ctl.metrics()["in_flight"] == 1
+
+    run(scenario())
@@ -0,0 +1,213 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.graph_snapshot import GraphSnapshot, current_version, export_snapshot
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __iter__(self):
+        return iter(SimpleNamespace(data=lambda row=row: dict(row)) for row in self.rows)
+
+    def single(self):
+        return self.rows[0]
+
+
+class FakeNeo4j:
+    """Answers the three snapshot queries (watermark, nodes, rels) and the refresh query."""
+
+    def __init__(self, nodes, rels, watermark=100):
+        self.nodes = nodes
+        self.rels = rels
+        self.watermark = watermark
+        self.changes = []
+        self.fail_refresh = False
+        self.queries = []
+        self.database = None
+        self.driver = SimpleNamespace(session=lambda database=None: self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, cypher, params=None):
+        self.queries.append((cypher, params))
+        if "collect(" in cypher:
+            if self.fail_refresh:
+                raise RuntimeError("connection reset")
+            return FakeResult(self.changes)
+        if "max(" in cypher:
+            return FakeResult([{"ts": self.watermark}])
+        if "MATCH (a)-[r]->(b)" in cypher:
+            return FakeResult(self.rels)
+        return FakeResult(self.nodes)
+
+
+def node(eid, legacy, label, type_):
+    return {"id": eid, "legacy_id": legacy, "type": type_, "label": label}
+
+
+@pytest.fixture
+def neo4j():
+    return FakeNeo4j(
+        nodes=[
+            node("4:db:2", 2, "Knee pain rehab", "Chunk"),
+            node("4:db:1", 1, "Squat", "Exercise"),
+            node("4:db:3", 3, "Quadriceps", "Muscle"),
+            node("4:db:4", 4, "Hamstrings", "Muscle"),
+        ],
+        rels=[
+            {"source": "4:db:2", "target": "4:db:1", "type": "MENTIONS"},
+            {"source": "4:db:1", "target": "4:db:3", "type": "TRAINS"},
+            {"source": "4:db:1", "target": "4:db:4", "type": "TRAINS"},
+        ],
+    )
+
+
+@pytest.fixture
+def snapshot(neo4j, tmp_path):
+    export_snapshot(neo4j, tmp_path, change_labels=["Chunk", "Exercise"])
+    return GraphSnapshot(tmp_path)
+
+
+def ids(nodes):
+    return sorted(n["id"] for n in nodes)
+
+
+def test_export_publishes_csr_and_string_tables(snapshot, tmp_path):
+    assert current_version(tmp_path) == snapshot.version
+    assert snapshot.node_count == 4
+    # Nodes are stored in elementId order so lookups can binary-search.
+    assert [snapshot.node_ids[i] for i in range(4)] == ["4:db:1", "4:db:2", "4:db:3", "4:db:4"]
+    # Every relationship appears in both endpoints' rows.
+    assert snapshot.indices.shape[0] == 6
+    assert snapshot.watermark == 100
+
+
+def test_export_watermark_only_reads_change_labels(neo4j, tmp_path):
+    export_snapshot(neo4j, tmp_path, change_labels=["Chunk"])
+    cypher = next(q for q, _ in neo4j.queries if "max(" in q)
+    assert "MATCH (n:`Chunk`)" in cypher
+    assert "MATCH (n)" not in cypher
+
+
+def test_exports_never_reuse_a_version_directory(neo4j, tmp_path):
+    first = export_snapshot(neo4j, tmp_path, keep=5)
+    second = export_snapshot(neo4j, tmp_path, keep=5)
+    assert first != second
+    assert current_version(tmp_path) == second.name
+
+
+def test_seeds_by_element_id_and_legacy_id(snapshot):
+    by_element = snapshot.seeds(["4:db:2", "missing"], [])
+    by_legacy = snapshot.seeds([], [3, 99])
+    assert [snapshot.node_ids[i] for i in by_element] == ["4:db:2"]
+    assert [snapshot.node_ids[i] for i in by_legacy] == ["4:db:3"]
+
+
+def test_expand_one_and_two_hops(snapshot):
+    seeds = snapshot.seeds(["4:db:2"], [])
+
+    nodes, edges = snapshot.expand(seeds, hops=1)
+    assert ids(nodes) == ["4:db:1", "4:db:2"]
+    assert edges == [{"source": "4:db:2", "target": "4:db:1", "relation": "MENTIONS"}]
+
+    nodes, edges = snapshot.expand(seeds, hops=2)
+    assert ids(nodes) == ["4:db:1", "4:db:2", "4:db:3", "4:db:4"]
+    assert {(e["source"], e["target"], e["relation"]) for e in edges} == {
+        ("4:db:2", "4:db:1", "MENTIONS"),
+        ("4:db:1", "4:db:3", "TRAINS"),
+        ("4:db:1", "4:db:4", "TRAINS"),
+    }
+
+
+def test_expand_respects_edge_limit(snapshot):
+    _, edges = snapshot.expand(snapshot.seeds(["4:db:1"], []), hops=1, limit=2)
+    assert len(edges) == 2
+
+
+def test_match_labels_is_case_insensitive(snapshot):
+    assert [snapshot.node_ids[i] for i in snapshot.match_labels("QUAD")] == ["4:db:3"]
+    assert len(snapshot.match_labels("s", limit=2)) == 2
+    assert snapshot.match_labels("elbow") == []
+
+
+def test_refresh_overlays_changed_and_new_nodes(snapshot, neo4j):
+    neo4j.changes = [
+        {
+            "id": "4:db:9",
+            "legacy_id": 9,
+            "type": "Chunk",
+            "label": "Lunge progression",
+            "ts": 200,
+            "rels": [
+                {
+                    "id": "4:db:1",
+                    "legacy_id": 1,
+                    "type": "Exercise",
+                    "label": "Bodyweight squat",
+                    "rel": "MENTIONS",
+                    "outgoing": True,
+                }
+            ],
+        }
+    ]
+
+    assert snapshot.refresh(neo4j) == 1
+    assert snapshot.watermark == 200
+    assert snapshot.node_count == 5
+
+    _, params = neo4j.queries[-1]
+    assert params == {"since": 100}
+
+    new = snapshot.seeds(["4:db:9"], [9])
+    assert len(new) == 1
+    nodes, edges = snapshot.expand(new, hops=1)
+    assert {n["id"]: n["label"] for n in nodes} == {
+        "4:db:9": "Lunge progression",
+        "4:db:1": "Bodyweight squat",
+    }
+    assert edges == [{"source": "4:db:9", "target": "4:db:1", "relation": "MENTIONS"}]
+
+    # The unchanged neighbour sees the mirrored edge too.
+    nodes, _ = snapshot.expand(snapshot.seeds(["4:db:1"], []), hops=1)
+    assert "4:db:9" in ids(nodes)
+
+    assert snapshot.match_labels("lunge") == new
+
+
+def test_failed_refresh_keeps_watermark_and_overlay(snapshot, neo4j):
+    neo4j.fail_refresh = True
+    with pytest.raises(RuntimeError):
+        snapshot.refresh(neo4j)
+    assert snapshot.watermark == 100
+
+    # A row that breaks part-way must not advance the watermark past the rows before it.
+    neo4j.fail_refresh = False
+    neo4j.changes = [
+        {"id": "4:db:9", "legacy_id": 9, "type": "Chunk", "label": "New", "ts": 300, "rels": []},
+        {"id": "4:db:2", "legacy_id": 2, "type": "Chunk", "label": "Edited", "ts": 250, "rels": [{}]},
+    ]
+    with pytest.raises(KeyError):
+        snapshot.refresh(neo4j)
+    assert snapshot.watermark == 100
+    assert snapshot.node_count == 4
+    assert snapshot.seeds(["4:db:9"], []) == []
+
+
+def test_refresh_with_no_changes_is_a_no_op(snapshot, neo4j):
+    assert snapshot.refresh(neo4j) == 0
+    assert snapshot.watermark == 100
+
+
+def test_empty_graph(tmp_path):
+    export_snapshot(FakeNeo4j(nodes=[], rels=[], watermark=None), tmp_path)
+    snapshot = GraphSnapshot(tmp_path)
+    assert snapshot.node_count == 0
+    assert snapshot.seeds(["4:db:1"], [1]) == []
+    assert snapshot.match_labels("knee") == []